@@ -0,0 +1,46 @@
+"""
+Run the solver benchmarks and track regressions against a baseline.
+
+Usage:
+    python -m optimization.benchmarks --save baseline.json
+    python -m optimization.benchmarks --compare baseline.json --time-threshold 0.25
+"""
+import argparse
+import sys
+
+import optimization.benchmarks.suite  # noqa: F401, registers the benchmarks
+from optimization.benchmarks.harness import compare, load_baseline, run_suite, save_baseline
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m optimization.benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='names', action='append', help='run the benchmarks containing this name')
+    parser.add_argument('--max-size', type=float, help='skip the problem sizes larger than this')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timing loops')
+    parser.add_argument('--save', help='write the results to this JSON baseline')
+    parser.add_argument('--compare', help='compare the results with this JSON baseline')
+    parser.add_argument('--time-threshold', type=float, default=0.25, help='tolerated relative slowdown')
+    parser.add_argument('--memory-threshold', type=float, default=0.25, help='tolerated relative memory increase')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.names, repeat=args.repeat, max_size=args.max_size)
+    for key, result in results.items():
+        print(f"{key:<50}{result['time_ms']:>14.4f} ms{result['peak_memory'] / 1e3:>14.1f} kB")
+
+    if args.save:
+        save_baseline(results, args.save)
+
+    if args.compare:
+        regressions = compare(results, load_baseline(args.compare), args.time_threshold, args.memory_threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['benchmark']} {regression['metric']}: "
+                  f"{regression['baseline']:.4g} -> {regression['current']:.4g} ({regression['ratio']:.2f}x)")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import importlib.util
+import json
+import platform
+import time
+import timeit
+
+from optimization.core.profiling import MEMORY_TRACER
+from optimization.core.wrappers import instrumentation
+
+# Benchmark name -> (setup function, sizes, required modules)
+BENCHMARKS = {}
+
+
+def benchmark(name, sizes, requires=()):
+    """
+    Decorator registering a benchmark over a ladder of problem sizes.
+
+    The decorated setup function receives a size and returns the zero-argument callable to be timed, so
+    that building the problem is not part of the measurement.
+
+    Args:
+        name (str): Name of the benchmark.
+        sizes (sequence): Problem sizes of the ladder.
+        requires (sequence of str): Modules needed by the benchmark; it is skipped if one is missing.
+
+    Returns:
+        function: The setup function, unchanged.
+    """
+
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, list(sizes), tuple(requires))
+        return setup
+
+    return decorator
+
+
+def measure(func, repeat=5, min_time=0.05):
+    """
+    Measure the execution time and peak memory of a callable.
+
+    The callable is run in loops lasting at least ``min_time`` seconds and the fastest of ``repeat`` loops
+    gives the time per call, which is the least sensitive to noise. The peak memory is measured during one
+    separate call.
+
+    Args:
+        func (callable): Zero-argument callable to be measured.
+        repeat (int): Number of timing loops.
+        min_time (float): Minimum duration of a timing loop, in seconds.
+
+    Returns:
+        dict: Time per call in milliseconds ('time_ms') and peak memory in bytes ('peak_memory').
+    """
+    timer = timeit.Timer(func, timer=time.perf_counter)
+    number = 1
+    while timer.timeit(number) < min_time and number < 10 ** 6:
+        number *= 10
+    time_ms = 1e3 * min(timer.repeat(repeat=repeat, number=number)) / number
+
+    frame = MEMORY_TRACER.enter()
+    try:
+        func()
+    finally:
+        _, peak = MEMORY_TRACER.exit(frame)
+
+    return {'time_ms': time_ms, 'peak_memory': peak}
+
+
+def run_suite(names=None, repeat=5, min_time=0.05, max_size=None):
+    """
+    Run the registered benchmarks with the solver instrumentation turned off.
+
+    Args:
+        names (sequence of str, optional): Substrings selecting the benchmarks to run. Defaults to all.
+        repeat (int): Number of timing loops, see measure().
+        min_time (float): Minimum duration of a timing loop, see measure().
+        max_size (float, optional): Skip the sizes of the ladders larger than this.
+
+    Returns:
+        dict: 'name[size]' -> dict with the benchmark name, the size, 'time_ms' and 'peak_memory'.
+    """
+    results = {}
+    for name, (setup, sizes, requires) in BENCHMARKS.items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        if any(importlib.util.find_spec(module) is None for module in requires):
+            continue
+
+        for size in sizes:
+            if max_size is not None and size > max_size:
+                continue
+            with instrumentation(False):
+                results[f'{name}[{size}]'] = {'name': name, 'size': size,
+                                              **measure(setup(size), repeat=repeat, min_time=min_time)}
+    return results
+
+
+def save_baseline(results, path):
+    """Write benchmark results, with a description of the machine, to a JSON file."""
+    baseline = {
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'processor': platform.processor()},
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+
+
+def load_baseline(path):
+    """Read the benchmark results saved by save_baseline()."""
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def compare(results, baseline, time_threshold=0.25, memory_threshold=0.25):
+    """
+    Find the benchmarks whose time or peak memory regressed with respect to a baseline.
+
+    Args:
+        results (dict): Results of run_suite().
+        baseline (dict): Results of a previous run, e.g. from load_baseline().
+        time_threshold (float): Tolerated relative increase of the time per call.
+        memory_threshold (float): Tolerated relative increase of the peak memory.
+
+    Returns:
+        list of dict: One entry per regression, with the benchmark key, the metric, the baseline and
+        current values and their ratio. Benchmarks missing from either side are ignored.
+    """
+    regressions = []
+    for key, current in results.items():
+        if key not in baseline:
+            continue
+        for metric, threshold in (('time_ms', time_threshold), ('peak_memory', memory_threshold)):
+            before, after = baseline[key][metric], current[metric]
+            if after > before * (1 + threshold):
+                regressions.append({'benchmark': key, 'metric': metric, 'baseline': before, 'current': after,
+                                    'ratio': after / before if before else float('inf')})
+    return regressions
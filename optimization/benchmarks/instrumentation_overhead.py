@@ -0,0 +1,44 @@
+"""
+Per-call overhead of the solver instrumentation.
+
+Usage:
+    python -m optimization.benchmarks.instrumentation_overhead
+"""
+import timeit
+
+from optimization.core.bus_allocation import BusAllocation
+
+
+def measure_overhead(n_students=321, number=2000, repeat=5):
+    """
+    Time the solver methods of BusAllocation with and without instrumentation.
+
+    Args:
+        n_students (int): Number of students to transport.
+        number (int): Number of calls per timing.
+        repeat (int): Number of timings, the best one is kept.
+
+    Returns:
+        dict: Method name -> (instrumented, uninstrumented) time per call in microseconds.
+    """
+    allocator = BusAllocation((35, 49, 57), (300, 400, 450), n_students)
+
+    timings = {}
+    for method in ('trivial_solution', 'educated_guess', 'dynamic_programming'):
+        solver = getattr(allocator, method)
+        per_call = []
+        for instrument in (True, False):
+            best = min(timeit.repeat(lambda: solver(instrument=instrument), number=number, repeat=repeat))
+            per_call.append(1e6 * best / number)
+        timings[method] = tuple(per_call)
+    return timings
+
+
+def main():
+    print(f"{'method':<22}{'instrumented (us)':>20}{'fast path (us)':>18}{'overhead':>12}")
+    for method, (instrumented, bare) in measure_overhead().items():
+        print(f"{method:<22}{instrumented:>20.2f}{bare:>18.2f}{instrumented / bare:>11.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""Benchmarks of the solvers, registered over ladders of problem sizes."""
+import numpy as np
+from scipy.optimize import minimize
+
+from optimization.benchmarks.harness import benchmark
+from optimization.core.bus_allocation import BusAllocation
+from optimization.core.power_cable import power_loss, size_cables
+from optimization.core.renewables import Consumer, EnergyDistribution, EnergySource
+
+SEAT_CONFIG = (35, 49, 57)
+COST_CONFIG = (300, 400, 450)
+
+
+def _bus_allocation(method, sizes):
+    def setup(n_students):
+        return getattr(BusAllocation(SEAT_CONFIG, COST_CONFIG, int(n_students)), method)
+
+    benchmark(f'bus_allocation.{method}', sizes)(setup)
+
+
+_bus_allocation('educated_guess', [10 ** 2, 10 ** 4, 10 ** 6])
+_bus_allocation('linear_programming', [10 ** 2, 10 ** 4])
+_bus_allocation('iterative_solution', [10 ** 2, 10 ** 3])
+_bus_allocation('dynamic_programming', [10 ** 2, 10 ** 4, 10 ** 6])
+
+
+def _energy_distribution():
+    system = EnergyDistribution()
+    system.add_source(EnergySource("Solar", 150, 0.15))
+    system.add_source(EnergySource("Wind", 100, 0.2))
+    system.add_consumer(Consumer("A", 90.))
+    system.add_consumer(Consumer("B", 120.))
+    system.read_max_values()
+    return system
+
+
+@benchmark('renewables.generate_many_solutions', [10 ** 2, 10 ** 4, 10 ** 6])
+def _generate_many_solutions(nsolutions):
+    system = _energy_distribution()
+    return lambda: system.generate_many_solutions(nsolutions=nsolutions, seed=0)
+
+
+@benchmark('renewables.cost_function', [1, 10 ** 3])
+def _cost_function(n_calls):
+    system = _energy_distribution()
+    solution = np.array([[20., 70.], [90., 30.]])
+    return lambda: [system.cost_function(solution) for _ in range(n_calls)]
+
+
+def _resolve_system(n_consumers):
+    rng = np.random.default_rng(0)
+    system = EnergyDistribution()
+    system.add_sources({'name': ["Solar", "Wind", "Hydro"], 'capacity': [150., 100., 80.],
+                        'cost_per_unit': [0.15, 0.2, 0.25]})
+    system.add_consumers({'name': [f"C{j}" for j in range(n_consumers)],
+                          'demand': rng.uniform(0, 250 / n_consumers, n_consumers)})
+    return system
+
+
+def _toggle_demand(system):
+    # Alternate the demand of the first consumer, so that every call solves a changed problem
+    system.update_demand("C0", system.demand[0] * (1.1 if system.demand[0] < 1 else 1 / 1.1))
+
+
+@benchmark('renewables.resolve', [2, 20])
+def _resolve(n_consumers):
+    system = _resolve_system(n_consumers)
+    system.solve(method='SLSQP')
+
+    def run():
+        _toggle_demand(system)
+        return system.resolve()
+
+    return run
+
+
+@benchmark('renewables.cold_solve', [2, 20])
+def _cold_solve(n_consumers):
+    system = _resolve_system(n_consumers)
+
+    def run():
+        _toggle_demand(system)
+        return system.solve(method='SLSQP')
+
+    return run
+
+
+@benchmark('power_cable.power_loss_minimize', [1, 100])
+def _power_loss_minimize(n_cables):
+    currents = np.linspace(10., 200., n_cables)
+
+    def run():
+        return [minimize(power_loss, x0=[0.01], bounds=[(0.001, 0.05)], args=(1.68e-8, 1000., current))
+                for current in currents]
+
+    return run
+
+
+@benchmark('power_cable.size_cables', [1, 100, 10 ** 5])
+def _size_cables(n_cables):
+    currents = np.linspace(10., 200., n_cables)
+    return lambda: size_cables(currents, 1.68e-8, 1000., 0.001, 0.05, h=10., delta_T=50.)
+
+
+def _optimal_power_flow(backend, sizes, requires=()):
+    def setup(num_generators):
+        from optimization.core.power_cable import OptimalPowerFlow
+
+        rng = np.random.default_rng(0)
+        cost_coeffs = [(a, b, c) for a, b, c in zip(rng.uniform(0.1, 0.2, num_generators),
+                                                     rng.uniform(10, 15, num_generators),
+                                                     rng.uniform(10, 30, num_generators))]
+        limits = {(f'{i + 1}', f'{j + 1}'): 100 for i in range(num_generators) for j in range(i + 1, num_generators)}
+
+        def run():
+            opf = OptimalPowerFlow(num_generators, cost_coeffs, [10] * num_generators, [100] * num_generators,
+                                   50 * num_generators, limits, backend=backend)
+            opf.setup_problem()
+            opf.solve()
+
+        return run
+
+    benchmark(f'power_cable.optimal_power_flow.{backend}', sizes, requires)(setup)
+
+
+_optimal_power_flow('docplex', [3, 10, 30], requires=('docplex',))
+_optimal_power_flow('slsqp', [3, 10, 30])
+_optimal_power_flow('trust-constr', [3, 10])
+
+
+@benchmark('power_cable.optimal_power_flow_build', [10 ** 2, 10 ** 4, 10 ** 6])
+def _optimal_power_flow_build(num_generators):
+    from optimization.core.power_cable import OptimalPowerFlow
+
+    # Sparse network: a chain of generators, with a line between neighbours only
+    cost_coeffs = np.tile([0.1, 12., 20.], (num_generators, 1))
+    lines = np.column_stack([np.arange(num_generators - 1), np.arange(1, num_generators),
+                             np.full(num_generators - 1, 20.)])
+
+    def run():
+        opf = OptimalPowerFlow(num_generators, cost_coeffs, 10., 100., 50. * num_generators, lines,
+                               backend='trust-constr')
+        opf.setup_problem()
+
+    return run
+
+
+@benchmark('power_cable.dispatch', [24, 168])
+def _dispatch(n_periods):
+    from optimization.core.power_cable import OptimalPowerFlow
+
+    # A week of hourly demand for 50 generators, by rolling windows of a day
+    rng = np.random.default_rng(0)
+    cost_coeffs = np.column_stack([rng.uniform(0.01, 0.05, 50), rng.uniform(10, 30, 50), rng.uniform(50, 300, 50)])
+    demand = 2000 + 1500 * np.sin(np.arange(n_periods) / 24 * 2 * np.pi)
+    opf = OptimalPowerFlow(50, cost_coeffs, 10., 100., 0., {})
+
+    return lambda: opf.dispatch(demand, ramp_rate=30, window=24, step=12)
+
+
+@benchmark('power_cable.optimal_power_flow_sweep', [10, 100])
+def _optimal_power_flow_sweep(n_demands):
+    from optimization.core.power_cable import OptimalPowerFlow
+
+    # Supply curve of 30 generators, all pairs connected, built once and warm-started
+    rng = np.random.default_rng(0)
+    cost_coeffs = np.column_stack([rng.uniform(0.1, 0.2, 30), rng.uniform(10, 15, 30), rng.uniform(10, 30, 30)])
+    limits = {(f'{i + 1}', f'{j + 1}'): 100 for i in range(30) for j in range(i + 1, 30)}
+    opf = OptimalPowerFlow(30, cost_coeffs, 10., 100., 1500., limits, backend='slsqp')
+    demands = np.linspace(400., 2900., n_demands)
+
+    return lambda: opf.sweep(demands)
@@ -1,14 +1,185 @@
 import math
-from optimization.core.wrappers import performance_measure, time_measure, print_output
+from optimization.core.cache import cached
+from optimization.core.wrappers import instrumented
+import numpy as np
+import pandas as pd
 import pulp
 
 
+def _dominant_type(seats, costs):
+    """
+    Finds the bus type with the lowest cost per seat and bounds the seats provided by all other types.
+
+    By an exchange argument, an optimal plan never uses ``seats[dominant]`` or more buses of the other
+    types in total: among that many buses, the prefix sums of their seats repeat modulo the dominant
+    capacity, so some subset seats exactly k times the dominant capacity and can be swapped for k
+    dominant buses at no higher cost. The non-dominant buses therefore seat at most ``bound`` students.
+
+    Parameters:
+        seats (sequence): Seat capacity of each bus type.
+        costs (sequence): Cost of each bus type.
+
+    Returns:
+        tuple: Index of the dominant bus type and the bound on seats offered by the other types.
+    """
+    dominant = min(range(len(seats)), key=lambda i: costs[i] / seats[i])
+    others = [int(seats[i]) for i in range(len(seats)) if i != dominant]
+    bound = (int(seats[dominant]) - 1) * max(others, default=0)
+    return dominant, bound
+
+
+def _covering_table(seats, costs, size):
+    """
+    Solves the covering knapsack for every number of students between 0 and ``size``.
+
+    ``table[s]`` is the minimum cost of seating at least s students and ``counts[s]`` the corresponding
+    number of buses of each type. Bus types are added one at a time: adding type t only relates entries
+    that differ by multiples of its seats, so each residue class is updated at once as a running minimum
+    of ``table[s] - k * cost`` along the class. Time and memory are O(size * number of types) with no
+    Python loop over the students.
+
+    Parameters:
+        seats (sequence): Seat capacity of each bus type.
+        costs (sequence): Cost of each bus type.
+        size (int): Largest number of students in the table.
+
+    Returns:
+        tuple: Cost table of shape (size + 1,) and bus counts of shape (size + 1, number of types).
+    """
+    seats = np.asarray(seats, dtype=np.int64)
+    costs = np.asarray(costs, dtype=float)
+    n_types = len(seats)
+
+    # Before adding any bus type, only zero students can be seated
+    table = np.full(size + 1, np.inf)
+    table[0] = 0.
+    counts = np.zeros((size + 1, n_types), dtype=np.int64)
+
+    for t in range(n_types):
+        seat, cost = int(seats[t]), costs[t]
+
+        # Entries below zero students are seated for free, then the table is padded to whole residue classes
+        n_rows = -(-(size + 1 + seat) // seat)
+        padded_table = np.full(n_rows * seat, np.inf)
+        padded_table[:seat] = 0.
+        padded_table[seat:seat + size + 1] = table
+        padded_counts = np.zeros((n_rows * seat, n_types), dtype=np.int64)
+        padded_counts[seat:seat + size + 1] = counts
+
+        # Row k of column r is the entry r + k * seat
+        k = np.arange(n_rows)[:, None]
+        shifted = padded_table.reshape(n_rows, seat) - k * cost
+        running_min = np.minimum.accumulate(shifted, axis=0)
+
+        # Row of the entry reached after removing all the buses of type t
+        origin = np.maximum.accumulate(np.where(shifted == running_min, k, 0), axis=0)
+
+        columns = np.arange(seat)
+        table = (running_min + k * cost).ravel()[seat:seat + size + 1]
+        new_counts = padded_counts.reshape(n_rows, seat, n_types)[origin, columns]
+        new_counts[..., t] += k - origin
+        counts = new_counts.reshape(-1, n_types)[seat:seat + size + 1]
+
+    return table, counts
+
+
+def _solve_covering(seats, costs, n_students):
+    """
+    Finds the cheapest number of buses of each type for one or many numbers of students.
+
+    A single covering table, built up to the largest number of students or to the bound on seats offered
+    by the non-dominant types, answers every query; the students beyond the table go to the dominant type.
+
+    Parameters:
+        seats (sequence): Seat capacity of each bus type.
+        costs (sequence): Cost of each bus type.
+        n_students (int or array_like): Number(s) of students to transport.
+
+    Returns:
+        numpy.ndarray: Number of buses of each type, with shape ``np.shape(n_students) + (len(seats),)``.
+    """
+    n_students = np.maximum(np.asarray(n_students, dtype=np.int64), 0)
+    dominant, bound = _dominant_type(seats, costs)
+    seat_dominant = int(seats[dominant])
+
+    # The table must cover every remainder left by the dominant buses, even when no other type exists
+    size = int(min(n_students.max(initial=0), max(bound, seat_dominant - 1)))
+    num_dominant = np.maximum(0, -(-(n_students - size) // seat_dominant))
+
+    _, counts = _covering_table(seats, costs, size)
+    num_buses = counts[n_students - num_dominant * seat_dominant].copy()
+    num_buses[..., dominant] += num_dominant
+    return num_buses
+
+
+def _solve_many_lp(seats, costs, n_students):
+    """
+    Solves the integer program for many numbers of students, building the PuLP model only once.
+
+    Between two solves only the right-hand side of the "Seat Requirement" constraint is updated.
+
+    Parameters:
+        seats (sequence): Seat capacity of each bus type.
+        costs (sequence): Cost of each bus type.
+        n_students (array_like): Numbers of students to transport.
+
+    Returns:
+        numpy.ndarray: Number of buses of each type, with shape (len(n_students), len(seats)).
+    """
+    prob = pulp.LpProblem("Bus_Allocation", pulp.LpMinimize)
+    x = [pulp.LpVariable(f'x_{i}', lowBound=0, cat=pulp.LpInteger) for i in range(len(seats))]
+
+    prob += pulp.lpSum(cost * var for cost, var in zip(costs, x)), "Total Cost"
+    prob += pulp.lpSum(seat * var for seat, var in zip(seats, x)) >= 0, "Seat Requirement"
+    seat_requirement = prob.constraints["Seat_Requirement"]
+
+    num_buses = np.zeros((len(n_students), len(seats)), dtype=np.int64)
+    for row, n in enumerate(n_students):
+        seat_requirement.constant = -int(n)
+        prob.solve(pulp.PULP_CBC_CMD(msg=False))
+        num_buses[row] = [round(var.value()) for var in x]
+    return num_buses
+
+
+def _solve_many(seats, costs, names, n_students, method):
+    """
+    Solves many bus allocation scenarios for the same fleet and formats them as a table.
+
+    Parameters:
+        seats (sequence): Seat capacity of each bus type.
+        costs (sequence): Cost of each bus type.
+        names (sequence): Label of each bus type, used as column names.
+        n_students (array_like): Numbers of students to transport.
+        method (str): Either 'dynamic_programming' or 'linear_programming'.
+
+    Returns:
+        pandas.DataFrame: One row per scenario, with the number of students, the number of buses of each
+        type and the minimum total cost.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    n_students = np.atleast_1d(np.asarray(n_students, dtype=np.int64))
+
+    if method == 'dynamic_programming':
+        num_buses = _solve_covering(seats, costs, n_students)
+    elif method == 'linear_programming':
+        num_buses = _solve_many_lp(seats, costs, n_students)
+    else:
+        raise ValueError(f"Unknown method {method}")
+
+    results = pd.DataFrame(num_buses, columns=list(names))
+    results.insert(0, 'n_students', n_students)
+    results['minimum_total_cost'] = num_buses @ np.asarray(costs)
+    return results
+
+
 class BusAllocation:
     """
     A class to handle bus allocation problems for transporting students.
     """
 
-    def __init__(self, seat_config, cost_config, n_students):
+    def __init__(self, seat_config, cost_config, n_students, cache=None):
         """
         Initializes the BusAllocation class with seat and cost configurations for buses.
 
@@ -16,10 +187,25 @@ class BusAllocation:
             seat_config (tuple): Tuple containing the seat capacity for bus_A, bus_B, and bus_C.
             cost_config (tuple): Tuple containing the cost for bus_A, bus_B, and bus_C.
             n_students (int): Total number of students to transport.
+            cache (ResultCache, optional): Cache where the results of the solver methods are memoized.
         """
         self.seat_a, self.seat_b, self.seat_c = seat_config
         self.cost_a, self.cost_b, self.cost_c = cost_config
         self.n_students = n_students
+        self.cache = cache
+
+    def configuration(self):
+        """
+        Describes the problem solved by this instance, used to key cached results.
+
+        Returns:
+            dict: Seat and cost configurations and number of students.
+        """
+        return {
+            'seat_config': [self.seat_a, self.seat_b, self.seat_c],
+            'cost_config': [self.cost_a, self.cost_b, self.cost_c],
+            'n_students': self.n_students
+        }
 
     def calc_total_cost(self, num_bus_a, num_bus_b, num_bus_c):
 
@@ -36,9 +222,8 @@ class BusAllocation:
         """
         return (num_bus_a * self.cost_a) + (num_bus_b * self.cost_b) + (num_bus_c * self.cost_c)
 
-    @time_measure
-    @performance_measure
-    @print_output
+    @instrumented
+    @cached
     def trivial_solution(self, bus='A'):
         num_bus_a: int = 0
         num_bus_b: int = 0
@@ -61,9 +246,8 @@ class BusAllocation:
 
         return result_dict
 
-    @time_measure
-    @performance_measure
-    @print_output
+    @instrumented
+    @cached
     def educated_guess(self):
         """
         Provides an educated guess solution where bus_A is only used after filling bus_B and bus_C.
@@ -88,9 +272,8 @@ class BusAllocation:
 
         return result_dict
 
-    @time_measure
-    @performance_measure
-    @print_output
+    @instrumented
+    @cached
     def linear_programming(self):
         """
         Solves the bus allocation problem using linear programming to minimize cost.
@@ -117,9 +300,8 @@ class BusAllocation:
 
         return result_dict
 
-    @time_measure
-    @performance_measure
-    @print_output
+    @instrumented
+    @cached
     def iterative_solution(self, verbose=False):
         """
         Iteratively explores all combinations of bus uses to find the one with the minimum cost.
@@ -167,3 +349,271 @@ class BusAllocation:
         }
 
         return result_dict
+
+    @instrumented
+    @cached
+    def dynamic_programming(self):
+        """
+        Finds the exact minimum cost with a covering knapsack over seat counts.
+
+        Only the cheapest bus type per seat can be used an unbounded number of times in an optimal plan,
+        so the table is built up to the bound on seats offered by the other types and the remaining
+        students are assigned to the dominant type. Time and memory are at most linear in n_students.
+
+        Returns:
+            dict: Dictionary containing the number of each type of bus used and the minimum cost.
+        """
+        seats = (self.seat_a, self.seat_b, self.seat_c)
+        costs = (self.cost_a, self.cost_b, self.cost_c)
+        num_buses = _solve_covering(seats, costs, self.n_students).tolist()
+
+        num_bus_a, num_bus_b, num_bus_c = num_buses
+        total_cost = self.calc_total_cost(num_bus_a, num_bus_b, num_bus_c)
+
+        result_dict = {
+            'A': num_bus_a,
+            'B': num_bus_b,
+            'C': num_bus_c,
+            'minimum_total_cost': total_cost
+        }
+
+        return result_dict
+
+    def solve_many(self, n_students, method='dynamic_programming'):
+        """
+        Solves the bus allocation problem for many numbers of students with the same buses.
+
+        With 'dynamic_programming' a single covering table answers every scenario, while with
+        'linear_programming' the PuLP model is built once and only its seat requirement changes.
+
+        Parameters:
+            n_students (array_like): Numbers of students to transport.
+            method (str): Either 'dynamic_programming' or 'linear_programming'.
+
+        Returns:
+            pandas.DataFrame: Columns 'n_students', 'A', 'B', 'C' and 'minimum_total_cost', one row per
+            scenario.
+        """
+        return _solve_many((self.seat_a, self.seat_b, self.seat_c), (self.cost_a, self.cost_b, self.cost_c),
+                           ('A', 'B', 'C'), n_students, method)
+
+
+class FleetAllocation:
+    """
+    A class to handle bus allocation problems for fleets with any number of bus types.
+    """
+
+    def __init__(self, seat_config, cost_config, n_students, names=None, cache=None):
+        """
+        Initializes the FleetAllocation class with seat and cost configurations for each bus type.
+
+        Parameters:
+            seat_config (sequence): Seat capacity of each bus type.
+            cost_config (sequence): Cost of each bus type.
+            n_students (int): Total number of students to transport.
+            names (sequence, optional): Label of each bus type, used as keys of the result dictionaries.
+                Defaults to 'A', 'B', 'C', ...
+            cache (ResultCache, optional): Cache where the results of the solver methods are memoized.
+
+        Raises:
+            ValueError: If the configurations do not describe the same number of bus types, or if a seat
+                capacity is not positive.
+        """
+        self.seats = np.asarray(seat_config, dtype=np.int64)
+        self.costs = np.asarray(cost_config)
+        self.n_students = n_students
+
+        if self.seats.ndim != 1 or self.seats.shape != self.costs.shape:
+            raise ValueError(f"Seat and cost configurations must have the same length "
+                             f"({self.seats.shape}!={self.costs.shape})")
+        if (self.seats <= 0).any():
+            raise ValueError(f"Seat capacities must be positive ({self.seats})")
+
+        if names is None:
+            names = [chr(ord('A') + i) if i < 26 else f'bus_{i}' for i in range(len(self.seats))]
+        if len(names) != len(self.seats):
+            raise ValueError(f"Expected {len(self.seats)} names, got {len(names)}")
+        self.names = list(names)
+        self.cache = cache
+
+    def configuration(self):
+        """
+        Describes the problem solved by this instance, used to key cached results.
+
+        Returns:
+            dict: Seat and cost configurations, names of the bus types and number of students.
+        """
+        return {
+            'seat_config': self.seats.tolist(),
+            'cost_config': self.costs.tolist(),
+            'names': self.names,
+            'n_students': self.n_students
+        }
+
+    @property
+    def n_types(self):
+        """Number of bus types in the fleet."""
+        return len(self.seats)
+
+    def calc_total_cost(self, num_buses):
+        """
+        Calculates the total cost based on the number of each type of bus used.
+
+        Parameters:
+            num_buses (sequence): Number of buses used for each type.
+
+        Returns:
+            Total cost of using the buses.
+        """
+        return (np.asarray(num_buses) @ self.costs).item()
+
+    def _result_dict(self, num_buses):
+        """Formats the number of each type of bus used and their total cost as a result dictionary."""
+        result_dict = {name: int(num) for name, num in zip(self.names, num_buses)}
+        result_dict['minimum_total_cost'] = self.calc_total_cost(num_buses)
+        return result_dict
+
+    @instrumented
+    @cached
+    def dynamic_programming(self):
+        """
+        Finds the exact minimum cost with a covering knapsack over seat counts.
+
+        Returns:
+            dict: Dictionary containing the number of each type of bus used and the minimum cost.
+        """
+        return self._result_dict(_solve_covering(self.seats, self.costs, self.n_students))
+
+    def solve_many(self, n_students, method='dynamic_programming'):
+        """
+        Solves the bus allocation problem for many numbers of students with the same fleet.
+
+        Parameters:
+            n_students (array_like): Numbers of students to transport.
+            method (str): Either 'dynamic_programming' or 'linear_programming'.
+
+        Returns:
+            pandas.DataFrame: Columns 'n_students', one per bus type and 'minimum_total_cost', one row per
+            scenario.
+        """
+        return _solve_many(self.seats, self.costs, self.names, n_students, method)
+
+    @instrumented
+    @cached
+    def brute_force(self, max_chunk_bytes=2 ** 26, prune=True):
+        """
+        Exhaustively evaluates the lattice of bus combinations in vectorized chunks.
+
+        Every type but the cheapest per seat spans the lattice, while the number of dominant buses is the
+        smallest one seating the remaining students. The lattice is built one bus type at a time, largest
+        seats first, and the last type is broadcast against the partial combinations in chunks. Points
+        violating the pruning bounds are masked out before the argmin over their costs.
+
+        When pruning, the non-dominant buses offer at most ``bound`` seats (see ``_dominant_type``) and
+        never more than ``n_students - 1`` plus their largest seat capacity, otherwise one of them could be
+        dropped. They also number fewer than the seats of the dominant type: among that many buses, some
+        subset seats a multiple of the dominant capacity and can be swapped for dominant buses at no
+        higher cost. Finally, a combination is discarded when its cost plus the cheapest possible price of
+        the remaining seats exceeds the cost of transporting everybody with dominant buses only.
+
+        Parameters:
+            max_chunk_bytes (int): Approximate memory budget of a single chunk.
+            prune (bool): If True, restricts the lattice with the bounds above, which never exclude all
+                the optimal plans. Without pruning, the whole box of up to ``ceil(n_students / seats)``
+                buses per type is explored, which is only practical for small instances.
+
+        Returns:
+            dict: Dictionary containing the number of each type of bus used and the minimum cost.
+        """
+        dominant, bound = _dominant_type(self.seats, self.costs)
+        seat_dominant = int(self.seats[dominant])
+        cost_dominant = self.costs[dominant]
+        n_students = max(self.n_students, 0)
+
+        # Non-dominant types, largest seats first so that the partial lattice stays small
+        others = sorted((i for i in range(self.n_types) if i != dominant), key=lambda i: -self.seats[i])
+
+        if prune and others:
+            max_seats = min(bound, n_students - 1 + int(self.seats[others].max()))
+            max_buses = seat_dominant - 1
+            max_cost = -(-n_students // seat_dominant) * cost_dominant
+        else:
+            max_seats = max_buses = max_cost = math.inf
+
+        def within_bounds(lattice_seats, lattice_buses, lattice_costs):
+            """Masks the lattice points satisfying the pruning bounds."""
+            remaining = np.maximum(n_students - lattice_seats, 0)
+            lower_bound = lattice_costs + remaining * cost_dominant / seat_dominant
+            return (lattice_seats <= max_seats) & (lattice_buses <= max_buses) & \
+                (lower_bound <= max_cost * (1 + 1e-9))
+
+        def extent(i):
+            """Largest number of buses of type i worth exploring."""
+            return int(min(-(-n_students // int(self.seats[i])), max_seats // int(self.seats[i]), max_buses))
+
+        # Partial combinations of all the non-dominant types but the last one
+        counts = np.zeros((1, 0), dtype=np.int64)
+        seated = np.zeros(1, dtype=np.int64)
+        buses = np.zeros(1, dtype=np.int64)
+        partial_costs = np.zeros(1)
+        for i in others[:-1]:
+            values = np.arange(extent(i) + 1)
+            keep = within_bounds(seated[:, None] + values * self.seats[i], buses[:, None] + values,
+                                 partial_costs[:, None] + values * self.costs[i])
+            rows, cols = np.nonzero(keep)
+            counts = np.column_stack([counts[rows], values[cols]])
+            seated = seated[rows] + values[cols] * self.seats[i]
+            buses = buses[rows] + values[cols]
+            partial_costs = partial_costs[rows] + values[cols] * self.costs[i]
+
+        if others:
+            last = others[-1]
+            values = np.arange(extent(last) + 1)
+        else:
+            last = dominant
+            values = np.zeros(1, dtype=np.int64)
+
+        # Memory of a lattice point: the seats, remaining students, dominant buses, bound, mask and cost columns
+        chunk_rows = max(1, max_chunk_bytes // (8 * 6 * len(values)))
+
+        best_cost = math.inf
+        best_buses = None
+        for start in range(0, len(counts), chunk_rows):
+            chunk = slice(start, start + chunk_rows)
+            lattice_seats = seated[chunk, None] + values * self.seats[last]
+            lattice_costs = partial_costs[chunk, None] + values * self.costs[last]
+            feasible = within_bounds(lattice_seats, buses[chunk, None] + values, lattice_costs)
+
+            num_dominant = -(-np.maximum(n_students - lattice_seats, 0) // seat_dominant)
+            lattice_costs = np.where(feasible, lattice_costs + num_dominant * cost_dominant, np.inf)
+
+            row, col = np.unravel_index(lattice_costs.argmin(), lattice_costs.shape)
+            if lattice_costs[row, col] < best_cost:
+                best_cost = lattice_costs[row, col]
+                best_buses = np.zeros(self.n_types, dtype=np.int64)
+                best_buses[others[:-1]] = counts[start + row]
+                if others:
+                    best_buses[last] = values[col]
+                best_buses[dominant] = num_dominant[row, col]
+
+        return self._result_dict(best_buses)
+
+    @instrumented
+    @cached
+    def linear_programming(self):
+        """
+        Solves the bus allocation problem using integer linear programming to minimize cost.
+
+        Returns:
+            dict: Dictionary containing the number of each type of bus used and the minimum cost.
+        """
+        prob = pulp.LpProblem("Fleet_Allocation", pulp.LpMinimize)
+        x = [pulp.LpVariable(f'x_{i}', lowBound=0, cat=pulp.LpInteger) for i in range(self.n_types)]
+
+        prob += pulp.lpSum(cost * var for cost, var in zip(self.costs.tolist(), x)), "Total Cost"
+        prob += pulp.lpSum(seat * var for seat, var in zip(self.seats.tolist(), x)) >= self.n_students, \
+            "Seat Requirement"
+
+        prob.solve(pulp.PULP_CBC_CMD(msg=False))
+
+        return self._result_dict([round(var.value()) for var in x])
@@ -0,0 +1,176 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+class ResultCache:
+    """
+    A bounded least-recently-used cache of solver results, optionally backed by a directory on disk.
+
+    Results are stored under a canonical hash of the problem configuration, the solver method and its
+    arguments. The number of hits and misses is counted so that callers can monitor the cache.
+
+    Example:
+        >>> cache = ResultCache(maxsize=1024, directory='~/.cache/bus_allocation')
+        >>> allocator = BusAllocation((35, 49, 57), (300, 400, 450), 321, cache=cache)
+        >>> allocator.linear_programming()  # solved by CBC
+        >>> allocator.linear_programming()  # read from the cache
+    """
+
+    def __init__(self, maxsize=128, directory=None):
+        """
+        Initialize a ResultCache object.
+
+        Args:
+            maxsize (int): Maximum number of results kept in memory.
+            directory (str or Path, optional): Directory where results are also stored as JSON files, so
+                that they survive the process and can be shared between processes.
+        """
+        self.maxsize = maxsize
+        self.directory = Path(directory).expanduser() if directory is not None else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._results)
+
+    @staticmethod
+    def make_key(configuration, method, arguments):
+        """
+        Compute the canonical hash of a solver call.
+
+        Args:
+            configuration (dict): JSON-serializable description of the problem.
+            method (str): Name of the solver method.
+            arguments (dict): Arguments of the solver method, defaults included.
+
+        Returns:
+            str: Hexadecimal SHA-256 digest.
+        """
+        payload = json.dumps({'configuration': configuration, 'method': method, 'arguments': arguments},
+                             sort_keys=True, separators=(',', ':'), default=_to_builtin)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a result, first in memory and then on disk.
+
+        Args:
+            key (str): Hash returned by make_key().
+
+        Returns:
+            dict or None: A copy of the stored result, or None if the key is unknown.
+        """
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            elif self.directory is not None:
+                result = self._read(key)
+                if result is not None:
+                    self._store(key, result)
+
+            if result is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return dict(result)
+
+    def put(self, key, result):
+        """
+        Store a result in memory and, if a directory was given, on disk.
+
+        Args:
+            key (str): Hash returned by make_key().
+            result (dict): JSON-serializable result of the solver.
+        """
+        result = dict(result)
+        with self._lock:
+            self._store(key, result)
+            if self.directory is not None:
+                self._write(key, result)
+
+    def clear(self):
+        """Empty the in-memory cache and reset the counters. Files on disk are kept."""
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _store(self, key, result):
+        self._results[key] = result
+        self._results.move_to_end(key)
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+    def _read(self, key):
+        try:
+            with open(self.directory / f'{key}.json') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write(self, key, result):
+        # Write to a temporary file first so that concurrent readers never see a partial result
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(result, f, default=_to_builtin)
+        os.replace(path, self.directory / f'{key}.json')
+
+
+def _to_builtin(value):
+    """Convert NumPy scalars and arrays to their JSON-serializable Python counterparts."""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def cached(func):
+    """
+    Decorator that looks up the result of a solver method in the cache of its instance.
+
+    The instance must expose a ``cache`` attribute (a ResultCache or None) and a ``configuration()``
+    method describing the problem. When the cache is None the method is called directly; otherwise the
+    cache hit and miss counters are added to the returned dictionary.
+
+    Args:
+        func (function): The solver method to be wrapped by the decorator.
+
+    Returns:
+        function: The wrapped method.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        cache = getattr(self, 'cache', None)
+        if cache is None:
+            return func(self, *args, **kwargs)
+
+        arguments = signature.bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        arguments = dict(list(arguments.arguments.items())[1:])
+        key = cache.make_key(self.configuration(), f'{type(self).__name__}.{func.__name__}', arguments)
+
+        result = cache.get(key)
+        if result is None:
+            result = func(self, *args, **kwargs)
+            cache.put(key, result)
+
+        result['cache_hits'] = cache.hits
+        result['cache_misses'] = cache.misses
+        return result
+
+    return wrapper
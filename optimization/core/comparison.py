@@ -0,0 +1,103 @@
+import signal
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from optimization.core.bus_allocation import BusAllocation
+
+# Strategy name -> (BusAllocation method, keyword arguments)
+STRATEGIES = {
+    'trivial_A': ('trivial_solution', {'bus': 'A'}),
+    'trivial_B': ('trivial_solution', {'bus': 'B'}),
+    'trivial_C': ('trivial_solution', {'bus': 'C'}),
+    'educated_guess': ('educated_guess', {}),
+    'linear_programming': ('linear_programming', {}),
+    'iterative_solution': ('iterative_solution', {}),
+    'dynamic_programming': ('dynamic_programming', {}),
+}
+
+
+def _raise_timeout(signum, frame):
+    raise TimeoutError
+
+
+def _run_strategy(seat_config, cost_config, n_students, strategy, timeout):
+    """
+    Runs one strategy for one number of students, in a worker process.
+
+    Process pool workers execute their tasks in the main thread, so a SIGALRM timer can interrupt a
+    runaway solver without killing the worker. On platforms without SIGALRM the timeout is not enforced.
+
+    Returns:
+        dict: The strategy, the number of students, its status and, if it succeeded, the solver result.
+    """
+    method, kwargs = STRATEGIES[strategy]
+    allocator = BusAllocation(seat_config, cost_config, n_students)
+    row = {'strategy': strategy, 'n_students': n_students}
+
+    use_alarm = timeout is not None and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        result = getattr(allocator, method)(**kwargs)
+        row.update(result)
+        row['status'] = 'ok'
+    except TimeoutError:
+        row['status'] = 'timeout'
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+    return row
+
+
+def compare_strategies(seat_config, cost_config, n_students, strategies=None, max_workers=None, timeout=None):
+    """
+    Runs the bus allocation strategies in parallel and compares their costs.
+
+    Each (strategy, number of students) pair is dispatched to a process pool. Strategies exceeding the
+    timeout are cancelled and reported with status 'timeout'. For each number of students, the gap is the
+    extra cost with respect to the cheapest plan found by any strategy.
+
+    Args:
+        seat_config (tuple): Tuple containing the seat capacity for bus_A, bus_B, and bus_C.
+        cost_config (tuple): Tuple containing the cost for bus_A, bus_B, and bus_C.
+        n_students (int or array_like): Number(s) of students to transport.
+        strategies (list of str, optional): Names of the strategies to compare, keys of STRATEGIES.
+            Defaults to all of them.
+        max_workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        timeout (float, optional): Time limit of a single task, in seconds.
+
+    Returns:
+        pandas.DataFrame: One row per task with the strategy, the number of students, the number of buses,
+        the cost, 'elapsed_time', 'peak', 'status', 'gap' and 'relative_gap'.
+
+    Raises:
+        KeyError: If a strategy is unknown.
+    """
+    strategies = list(STRATEGIES) if strategies is None else list(strategies)
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            raise KeyError(f'Unknown strategy {strategy}')
+
+    n_students = np.atleast_1d(n_students).astype(int).tolist()
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_strategy, seat_config, cost_config, n, strategy, timeout)
+                   for n in n_students for strategy in strategies]
+        rows = [future.result() for future in futures]
+
+    table = pd.DataFrame(rows)
+    for column in ('A', 'B', 'C', 'minimum_total_cost', 'elapsed_time', 'peak'):
+        if column not in table:
+            table[column] = np.nan
+    table = table[['strategy', 'n_students', 'A', 'B', 'C', 'minimum_total_cost', 'elapsed_time', 'peak',
+                   'status']]
+
+    best_cost = table.groupby('n_students')['minimum_total_cost'].transform('min')
+    table['gap'] = table['minimum_total_cost'] - best_cost
+    table['relative_gap'] = table['gap'] / best_cost
+    return table
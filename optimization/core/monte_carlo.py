@@ -0,0 +1,239 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.optimize import linprog
+
+from optimization.core.renewables import merit_order_dispatch
+
+
+class StreamingStatistics:
+    """
+    Mean, variance, extrema and quantiles of a stream of values, in constant memory.
+
+    The mean and variance are updated with Welford's algorithm, batch by batch, and two summaries are
+    merged with Chan's formula. Quantiles come from a logarithmic histogram: a value x > 0 falls in the
+    bin ceil(log(x) / log(gamma)), with gamma = (1 + a) / (1 - a), so that every quantile is estimated
+    with a relative error of at most a. The number of bins only grows with the logarithm of the range of
+    the values, and histograms are merged by adding counts.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        """
+        Args:
+            relative_accuracy (float, optional): Relative accuracy a of the quantiles, in (0, 1).
+
+        Raises:
+            ValueError: If the relative accuracy is not in (0, 1).
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"The relative accuracy must be in (0, 1), got {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        self._log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self.count = 0
+        self.mean = 0.
+        self._m2 = 0.
+        self.min = math.inf
+        self.max = -math.inf
+        self._zeros = 0
+        self._positive = {}  # Bin -> count of the values > 0
+        self._negative = {}  # Bin -> count of the values < 0, binned by absolute value
+
+    @property
+    def variance(self):
+        """float: Sample variance, NaN with less than two values."""
+        return self._m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self):
+        """float: Sample standard deviation."""
+        return math.sqrt(self.variance)
+
+    def _merge_moments(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    def _add_bins(self, bins, values):
+        indices, counts = np.unique(np.ceil(np.log(values) / self._log_gamma).astype(np.int64),
+                                    return_counts=True)
+        for index, count in zip(indices.tolist(), counts.tolist()):
+            bins[index] = bins.get(index, 0) + count
+
+    def update(self, values):
+        """
+        Add a batch of values.
+
+        Args:
+            values (array_like): Values to add; NaN values are not allowed.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values) == 0:
+            return
+
+        mean = float(values.mean())
+        self._merge_moments(len(values), mean, float(((values - mean) ** 2).sum()))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._zeros += int((values == 0).sum())
+        self._add_bins(self._positive, values[values > 0])
+        self._add_bins(self._negative, -values[values < 0])
+
+    def merge(self, other):
+        """
+        Add the values summarized by another StreamingStatistics with the same relative accuracy.
+
+        Raises:
+            ValueError: If the relative accuracies differ.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge statistics with different relative accuracies")
+        if other.count == 0:
+            return
+
+        self._merge_moments(other.count, other.mean, other._m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._zeros += other._zeros
+        for bins, other_bins in ((self._positive, other._positive), (self._negative, other._negative)):
+            for index, count in other_bins.items():
+                bins[index] = bins.get(index, 0) + count
+
+    def quantile(self, q):
+        """
+        Estimate a quantile.
+
+        Args:
+            q (float): Quantile, in [0, 1].
+
+        Returns:
+            float: Estimate within the relative accuracy of the value of rank q * (count - 1).
+
+        Raises:
+            ValueError: If no value was added, or if q is not in [0, 1].
+        """
+        if self.count == 0:
+            raise ValueError("No value was added")
+        if not 0 <= q <= 1:
+            raise ValueError(f"The quantile must be in [0, 1], got {q}")
+
+        rank = q * (self.count - 1)
+        gamma = math.exp(self._log_gamma)
+        # Bins in increasing order of their values: negative bins by decreasing index, then zeros
+        ordered = [(-2 * gamma ** index / (gamma + 1), count) for index, count in
+                   sorted(self._negative.items(), reverse=True)]
+        ordered.append((0., self._zeros))
+        ordered += [(2 * gamma ** index / (gamma + 1), count) for index, count in sorted(self._positive.items())]
+
+        seen = 0
+        for value, count in ordered:
+            seen += count
+            if seen > rank:
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self, quantiles=(0.05, 0.5, 0.95)):
+        """
+        Summarize the statistics.
+
+        Args:
+            quantiles (sequence of float, optional): Quantiles to estimate.
+
+        Returns:
+            dict: 'count', 'mean', 'std', 'min', 'max' and the quantiles under 'quantiles', by quantile.
+        """
+        return {'count': self.count, 'mean': self.mean, 'std': self.std, 'min': self.min, 'max': self.max,
+                'quantiles': {q: self.quantile(q) for q in quantiles} if self.count else {}}
+
+
+def _run_scenarios(problem, n_scenarios, seed_sequence, capacity_std, demand_std, method, relative_accuracy):
+    """
+    Samples and solves a batch of scenarios, in a worker process.
+
+    Returns:
+        tuple: StreamingStatistics of the optimal costs of the feasible scenarios, and the number of
+        infeasible scenarios.
+    """
+    n_sources, n_consumers = problem.shape
+    rng = np.random.default_rng(seed_sequence)
+    capacity = problem.b_ub * np.clip(1 + capacity_std * rng.standard_normal((n_scenarios, n_sources)), 0, None)
+    demand = problem.b_eq * np.clip(1 + demand_std * rng.standard_normal((n_scenarios, n_consumers)), 0, None)
+
+    statistics = StreamingStatistics(relative_accuracy)
+    if method == 'merit_order':
+        feasible = demand.sum(axis=1) <= capacity.sum(axis=1)
+        flows = merit_order_dispatch(capacity[feasible], problem.c[::n_consumers], demand[feasible])
+        statistics.update(flows.reshape(len(flows), -1) @ problem.c)
+        return statistics, int(n_scenarios - feasible.sum())
+
+    costs = []
+    for b_ub, b_eq in zip(capacity, demand):
+        result = linprog(problem.c, A_ub=problem.A_ub, b_ub=b_ub, A_eq=problem.A_eq, b_eq=b_eq, bounds=(0, None),
+                         method=method)
+        if result.success:
+            costs.append(result.fun)
+    statistics.update(costs)
+    return statistics, n_scenarios - len(costs)
+
+
+def monte_carlo(system, n_scenarios, capacity_std=0.1, demand_std=0.1, seed=None, edge_costs=None, method=None,
+                batch_size=10 ** 4, max_workers=None, relative_accuracy=0.01, quantiles=(0.05, 0.5, 0.95)):
+    """
+    Distribution of the optimal cost of an energy distribution under uncertain capacities and demands.
+
+    Every scenario multiplies each capacity and demand by an independent factor 1 + std * N(0, 1),
+    clipped at zero, and is solved as in EnergyDistribution.solve_transport(). The scenarios are split
+    into batches solved on a process pool, each with its own random stream spawned from a single
+    numpy.random.SeedSequence, so that the results only depend on the seed and the batch size. Each batch
+    is reduced to streaming statistics in its worker, and only these summaries are merged, so that the
+    memory does not grow with the number of scenarios.
+
+    Args:
+        system (EnergyDistribution): Nominal energy distribution.
+        n_scenarios (int): Number of scenarios.
+        capacity_std (float, optional): Relative standard deviation of the capacities.
+        demand_std (float, optional): Relative standard deviation of the demands.
+        seed (int or numpy.random.SeedSequence, optional): Seed of the random streams.
+        edge_costs (array_like, optional): Additional cost per unit of each flow, with shape
+            (n_sources, n_consumers).
+        method (str, optional): As in EnergyDistribution.solve_transport(); every scenario is solved by
+            linprog unless the merit order is used.
+        batch_size (int, optional): Number of scenarios per task.
+        max_workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        relative_accuracy (float, optional): Relative accuracy of the quantiles.
+        quantiles (sequence of float, optional): Quantiles of the optimal cost to estimate.
+
+    Returns:
+        dict: Statistics of the optimal cost of the feasible scenarios, as returned by
+        StreamingStatistics.summary(), and the number of infeasible scenarios under 'infeasible'.
+
+    Raises:
+        ValueError: If the merit order is asked with edge costs.
+    """
+    problem = system.transport_problem(edge_costs)
+    if method is None:
+        method = 'merit_order' if edge_costs is None else 'highs-ipm'
+    if method == 'merit_order' and edge_costs is not None:
+        raise ValueError("The merit order does not support edge costs")
+
+    sizes = [batch_size] * (n_scenarios // batch_size)
+    if n_scenarios % batch_size:
+        sizes.append(n_scenarios % batch_size)
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+    statistics = StreamingStatistics(relative_accuracy)
+    infeasible = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_scenarios, problem, size, child, capacity_std, demand_std, method,
+                                   relative_accuracy)
+                   for size, child in zip(sizes, seed_sequence.spawn(len(sizes)))]
+        for future in futures:
+            batch_statistics, batch_infeasible = future.result()
+            statistics.merge(batch_statistics)
+            infeasible += batch_infeasible
+
+    summary = statistics.summary(quantiles)
+    summary['infeasible'] = infeasible
+    return summary
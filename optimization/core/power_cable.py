@@ -1,27 +1,439 @@
-from docplex.mp.model import Model
+import importlib.util
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp, minimize
+
+OPFResult = namedtuple('OPFResult', ['outputs', 'objective', 'marginal_price', 'line_duals', 'status',
+                                     'build_time', 'solve_time'])
+OPFResult.__doc__ = """
+Solution of an OptimalPowerFlow: the 'outputs' of the generators as an array, the 'objective', the
+'marginal_price' (dual of the demand, the cost of one more MW of demand), the 'line_duals' (derivative of the
+objective by the limit of each line of OptimalPowerFlow.lines, zero or negative), the 'status' and the
+'build_time' and 'solve_time' in milliseconds. The status is 'optimal', 'iteration_limit' when the solver
+stopped before converging, with the outputs and objective of its last point but no duals, 'infeasible' or
+'failed'. The outputs, objective and duals are None when no solution is found.
+"""
+
+
+def print_result(result):
+    """
+    Print the outputs and the total cost of an OPFResult, as a reporter of OptimalPowerFlow.solve().
+
+    Args:
+        result (OPFResult): Solution to print.
+    """
+    if result.status == 'optimal':
+        print("Solution found:")
+        for i, output in enumerate(result.outputs):
+            print(f"Generator {i + 1} Output: {output:.2f} MW")
+        print(f"Total Generation Cost: ${result.objective:.2f}")
+    elif result.status == 'infeasible':
+        print("No solution found")
+    else:
+        print(f"No solution found ({result.status})")
+
+
+class _DocplexBackend:
+    """Quadratic program modelled with docplex and solved by CPLEX."""
+
+    module = 'docplex'
+
+    def __init__(self, opf):
+        # CPLEX is only needed by this backend, not to use the rest of this module
+        from docplex.mp.model import Model
+
+        self.opf = opf
+        self.model = Model('OptimalPowerFlow')
+        self.power = self.model.continuous_var_list(opf.num_generators, lb=opf.min_output, ub=opf.max_output,
+                                                    name='Power')
+
+    def setup_problem(self):
+        opf = self.opf
+        # Objective: Minimize total cost
+        total_cost = self.model.sum(opf.cost_coeffs[i][0] * self.power[i] ** 2 +
+                                    opf.cost_coeffs[i][1] * self.power[i] +
+                                    opf.cost_coeffs[i][2] for i in range(opf.num_generators))
+        self.model.minimize(total_cost)
+
+        # Constraint: Demand must be met
+        self.demand_constraint = self.model.add_constraint(self.model.sum(self.power) == opf.demand,
+                                                           'DemandSatisfaction')
+
+        # Constraints: Transmission limits, as two linear inequalities per line added in bulk
+        first, second, limits = (values.tolist() for values in opf.lines)
+        lines = list(zip(first, second, limits))
+        self.line_constraints = (
+            self.model.add_constraints([self.power[i] - self.power[j] <= limit for i, j, limit in lines],
+                                       [f'TransLimit_{i + 1}_{j + 1}' for i, j, _ in lines]),
+            self.model.add_constraints([self.power[j] - self.power[i] <= limit for i, j, limit in lines],
+                                       [f'TransLimit_{j + 1}_{i + 1}' for i, j, _ in lines]))
+
+    def update_demand(self, demand):
+        self.demand_constraint.set_right_expr(demand)
+
+    def solve(self, x0=None):
+        # CPLEX restarts from the previous solution of the modified model by itself, so x0 is not needed
+        solution = self.model.solve()
+        if not solution:
+            return None, None, None, None, 'infeasible'
+        # Only one direction of a line can bind, so the dual of the line is the sum of both
+        line_duals = sum(np.array(self.model.dual_values(constraints), dtype=float)
+                         for constraints in self.line_constraints)
+        return (np.array([solution[power] for power in self.power]), solution.get_objective_value(),
+                self.demand_constraint.dual_value, line_duals, 'optimal')
+
+
+class _ScipyBackend:
+    """
+    Convex quadratic program solved by scipy.optimize.minimize with the trust-constr method.
+
+    The objective comes with its exact gradient and constant diagonal Hessian, and every transmission
+    limit |p_i - p_j| <= limit is a row of a sparse two-sided LinearConstraint, so no auxiliary variable
+    is needed.
+    """
+
+    module = 'scipy'
+    method = 'trust-constr'
+    options = {}
+    iteration_limit_status = 0  # Status of the result when the maximum number of iterations is reached
+
+    def __init__(self, opf):
+        self.opf = opf
+
+    def setup_problem(self):
+        opf = self.opf
+        n = opf.num_generators
+        self.a, self.b, self.c = np.asarray(opf.cost_coeffs, dtype=float).reshape(n, 3).T
+        self.hessian = sparse.diags_array(2 * self.a, format='csr')
+        self.bounds = Bounds(np.broadcast_to(np.asarray(opf.min_output, dtype=float), n),
+                             np.broadcast_to(np.asarray(opf.max_output, dtype=float), n))
+
+        self.constraints = [LinearConstraint(sparse.csr_array(np.ones((1, n))), opf.demand, opf.demand)]
+        first, second, limits = opf.lines
+        if len(limits):
+            rows = np.arange(len(limits))
+            difference = sparse.csr_array((np.r_[np.ones(len(rows)), -np.ones(len(rows))],
+                                           (np.r_[rows, rows], np.r_[first, second])), shape=(len(rows), n))
+            self.constraints.append(LinearConstraint(difference, -limits, limits))
+
+    def _minimize(self, x0):
+        return minimize(lambda p: (self.a * p ** 2 + self.b * p + self.c).sum(), x0,
+                        jac=lambda p: 2 * self.a * p + self.b, hess=lambda p: self.hessian, method=self.method,
+                        bounds=self.bounds, constraints=self.constraints, options=self.options)
+
+    def _duals(self, result):
+        # trust-constr returns the Lagrange multipliers of each constraint, with the sign of its gradient
+        line_duals = -np.abs(result.v[1]) if len(result.v) > 1 else np.zeros(0)
+        return -float(result.v[0][0]), line_duals
+
+    def update_demand(self, demand):
+        self.constraints[0] = LinearConstraint(self.constraints[0].A, demand, demand)
+
+    def solve(self, x0=None, tolerance=1e-6):
+        lower, upper = self.bounds.lb, self.bounds.ub
+        if x0 is None:
+            # Start from the demand split in proportion to the generator ranges
+            share = (self.opf.demand - lower.sum()) / max((upper - lower).sum(), 1e-12)
+            x0 = lower + np.clip(share, 0, 1) * (upper - lower)
+
+        result = self._minimize(x0)
+        violation = max([abs(result.x.sum() - self.opf.demand)] +
+                        [np.maximum(np.abs(constraint.A @ result.x) - constraint.ub, 0).max()
+                         for constraint in self.constraints[1:]])
+        feasible = violation <= tolerance * max(1., abs(self.opf.demand))
+        if result.success and feasible:
+            return (result.x, float(result.fun), *self._duals(result), 'optimal')
+        if not result.success and result.status == self.iteration_limit_status:
+            return result.x, float(result.fun), None, None, 'iteration_limit'
+        return None, None, None, None, 'failed' if feasible else 'infeasible'
+
+
+class _SlsqpBackend(_ScipyBackend):
+    """
+    Convex quadratic program solved by scipy.optimize.minimize with the SLSQP method.
+
+    SLSQP works on dense constraint matrices, which is faster than trust-constr for up to a few
+    thousand transmission limits.
+    """
+
+    method = 'SLSQP'
+    options = {'ftol': 1e-12, 'maxiter': 500}
+    iteration_limit_status = 9
+
+    def _minimize(self, x0):
+        a, b, c = self.a, self.b, self.c
+        constraints = [{'type': 'eq', 'fun': lambda p: [p.sum() - self.opf.demand],
+                        'jac': lambda p: np.ones((1, len(p)))}]
+        for constraint in self.constraints[1:]:
+            matrix, limits = constraint.A.toarray(), constraint.ub
+            constraints.append({'type': 'ineq', 'fun': lambda p: np.r_[limits - matrix @ p, limits + matrix @ p],
+                                'jac': lambda p: np.r_[-matrix, matrix]})
+        return minimize(lambda p: (a * p ** 2 + b * p + c).sum(), x0, jac=lambda p: 2 * a * p + b,
+                        method=self.method, bounds=self.bounds, constraints=constraints, options=self.options)
+
+    def _duals(self, result, tolerance=1e-6):
+        # SLSQP does not return its multipliers with every SciPy version, so they are solved from the KKT
+        # conditions: at every generator strictly within its bounds, the marginal cost 2 a p + b equals the
+        # marginal price plus the duals of the binding lines through it
+        p = result.x
+        lower, upper = self.bounds.lb, self.bounds.ub
+        margin = tolerance * np.maximum(1., upper - lower)
+        free = (p > lower + margin) & (p < upper - margin)
+
+        line_duals = np.zeros(len(self.opf.lines[2]))
+        if len(self.constraints) > 1:
+            matrix, limits = self.constraints[1].A.toarray(), self.constraints[1].ub
+            flows = matrix @ p
+            binding = np.flatnonzero(np.abs(flows) >= limits - tolerance * np.maximum(1., limits))
+        else:
+            matrix, flows, binding = np.zeros((0, len(p))), np.zeros(0), np.zeros(0, dtype=int)
+        if not free.any():
+            # Every generator is at a bound, so the price is not unique
+            return np.nan, line_duals
+
+        system = np.column_stack([np.ones(free.sum()), matrix[binding][:, free].T])
+        solution = np.linalg.lstsq(system, (2 * self.a * p + self.b)[free], rcond=None)[0]
+        # The derivative of the objective by a limit is the multiplier of p_i - p_j at its upper limit,
+        # and its opposite at its lower limit
+        line_duals[binding] = np.sign(flows[binding]) * solution[1:]
+        return float(solution[0]), line_duals
+
+
+def transmission_lines(transmission_limits, num_generators):
+    """
+    Convert transmission limits to arrays, one entry per line.
+
+    Only the generators connected by a line have a transmission constraint, so the size of the problem
+    grows with the number of lines rather than with the number of pairs of generators.
+
+    Args:
+        transmission_limits: Limits as a dictionary {('1', '2'): limit} with 1-based generator numbers,
+            as a scipy.sparse matrix whose entry (i, j) is the limit of the line between generators i and j,
+            or as a sequence of (i, j, limit) rows, with 0-based generator indices in the last two cases.
+        num_generators (int): Number of generators.
+
+    Returns:
+        tuple of numpy.ndarray: First generator, second generator and limit of each line.
+
+    Raises:
+        ValueError: If a generator index is out of range.
+    """
+    if isinstance(transmission_limits, dict):
+        keys = list(transmission_limits)
+        first = np.array([int(i) - 1 for i, _ in keys], dtype=np.int64)
+        second = np.array([int(j) - 1 for _, j in keys], dtype=np.int64)
+        limits = np.array(list(transmission_limits.values()), dtype=float)
+    elif sparse.issparse(transmission_limits):
+        matrix = sparse.coo_array(transmission_limits)
+        first, second, limits = matrix.row.astype(np.int64), matrix.col.astype(np.int64), matrix.data.astype(float)
+    else:
+        table = np.asarray(transmission_limits, dtype=float).reshape(-1, 3)
+        first, second, limits = table[:, 0].astype(np.int64), table[:, 1].astype(np.int64), table[:, 2]
+
+    if len(limits) and (min(first.min(), second.min()) < 0 or max(first.max(), second.max()) >= num_generators):
+        raise ValueError(f"The generator indices of the lines must be in [0, {num_generators})")
+    return first, second, limits
+
+
+class _DispatchWindow:
+    """
+    Mixed-integer linear program of the dispatch of an OPF over a window of periods.
+
+    The quadratic cost of each generator is replaced by its piecewise-linear interpolation over equal
+    segments of [min_output, max_output]. The cost is convex, so the segments fill up in order without
+    extra binaries. The variables are the segment outputs s[t, g, k] and, with commitment, the on/off
+    status u[t, g], so that the output is p[t, g] = min_output[g] u[t, g] + sum_k s[t, g, k]. The
+    constraint matrix only depends on the window length; demands and initial outputs only change the
+    bounds of its rows.
+    """
+
+    def __init__(self, opf, n_periods, ramp_rate, commitment, segments):
+        n = opf.num_generators
+        a, b, c = np.asarray(opf.cost_coeffs, dtype=float).reshape(n, 3).T
+        low = np.broadcast_to(np.asarray(opf.min_output, dtype=float), n)
+        width = (np.broadcast_to(np.asarray(opf.max_output, dtype=float), n) - low) / segments
+        breakpoints = low[:, None] + width[:, None] * np.arange(segments + 1)
+        cost = a[:, None] * breakpoints ** 2 + b[:, None] * breakpoints + c[:, None]
+        slopes = np.diff(cost, axis=1) / np.where(width > 0, width, 1)[:, None]
+
+        self.n_generators, self.n_periods, self.commitment = n, n_periods, commitment
+        self.n_segments = n_periods * n * segments
+        n_outputs = n_periods * n
+        n_variables = self.n_segments + (n_outputs if commitment else 0)
+
+        # Outputs p = P @ x + p_constant, period-major
+        self.P = sparse.csr_array((np.ones(self.n_segments), (np.repeat(np.arange(n_outputs), segments),
+                                                               np.arange(self.n_segments))),
+                                  shape=(n_outputs, n_variables))
+        if commitment:
+            self.P = self.P + sparse.csr_array((np.tile(low, n_periods), (np.arange(n_outputs),
+                                                                          self.n_segments + np.arange(n_outputs))),
+                                               shape=(n_outputs, n_variables))
+            self.p_constant = np.zeros(n_outputs)
+        else:
+            self.p_constant = np.tile(low, n_periods)
+
+        # Rows as (operator applied to the outputs, lower bound, upper bound)
+        blocks = [(sparse.kron(sparse.identity(n_periods), np.ones((1, n)), format='csr'), 0., 0.)]
+        self.ramp_rate = None
+        if ramp_rate is not None:
+            self.ramp_rate = np.broadcast_to(np.asarray(ramp_rate, dtype=float), n)
+            ramp = np.tile(self.ramp_rate, n_periods)
+            blocks.append((sparse.identity(n_outputs, format='csr') - sparse.eye(n_outputs, k=-n, format='csr'),
+                           -ramp, ramp))
+        first, second, limits = opf.lines
+        if len(limits):
+            rows = np.arange(len(limits))
+            difference = sparse.csr_array((np.r_[np.ones(len(rows)), -np.ones(len(rows))],
+                                           (np.r_[rows, rows], np.r_[first, second])), shape=(len(rows), n))
+            blocks.append((sparse.kron(sparse.identity(n_periods), difference, format='csr'),
+                           -np.tile(limits, n_periods), np.tile(limits, n_periods)))
+
+        matrices = [operator @ self.P for operator, _, _ in blocks]
+        constants = [operator @ self.p_constant for operator, _, _ in blocks]
+        lower = [np.broadcast_to(bound, operator.shape[0]) for operator, bound, _ in blocks]
+        upper = [np.broadcast_to(bound, operator.shape[0]) for operator, _, bound in blocks]
+        if commitment:
+            # A segment can only be used when its generator is on: s[t, g, k] <= width[g] u[t, g]
+            segment = np.arange(self.n_segments)
+            matrices.append(sparse.csr_array((np.r_[np.ones(self.n_segments), -np.tile(np.repeat(width, segments),
+                                                                                         n_periods)],
+                                              (np.r_[segment, segment], np.r_[segment, self.n_segments +
+                                                                              segment // segments])),
+                                             shape=(self.n_segments, n_variables)))
+            constants.append(np.zeros(self.n_segments))
+            lower.append(np.full(self.n_segments, -np.inf))
+            upper.append(np.zeros(self.n_segments))
+
+        self.A = sparse.vstack(matrices, format='csr')
+        # HiGHS takes 32-bit indices, which older SciPy versions do not convert by themselves
+        self.A.indices = self.A.indices.astype(np.int32)
+        self.A.indptr = self.A.indptr.astype(np.int32)
+        constant = np.concatenate(constants)
+        self.lower = np.concatenate(lower) - constant
+        self.upper = np.concatenate(upper) - constant
+        self.demand_constant = constants[0]
+        self.ramp_rows = slice(n_periods, n_periods + n) if ramp_rate is not None else None
+
+        self.c = np.tile(slopes.ravel(), n_periods)
+        upper_bounds = np.tile(np.repeat(width, segments), n_periods)
+        self.integrality = np.zeros(n_variables)
+        if commitment:
+            self.c = np.r_[self.c, np.tile(cost[:, 0], n_periods)]
+            upper_bounds = np.r_[upper_bounds, np.ones(n_outputs)]
+            self.integrality[self.n_segments:] = 1
+        self.bounds = Bounds(np.zeros(n_variables), upper_bounds)
+
+    def solve(self, demand, initial_output=None, options=None):
+        """
+        Returns:
+            tuple: Outputs and on/off status with shape (n_generators, n_periods), or None if no feasible
+            dispatch was found. With a time limit, the best dispatch found so far is returned.
+        """
+        lower, upper = self.lower.copy(), self.upper.copy()
+        lower[:self.n_periods] = upper[:self.n_periods] = demand - self.demand_constant
+        if self.ramp_rows is not None:
+            if initial_output is None:
+                lower[self.ramp_rows], upper[self.ramp_rows] = -np.inf, np.inf
+            else:
+                lower[self.ramp_rows] += initial_output
+                upper[self.ramp_rows] += initial_output
+
+        result = milp(self.c, integrality=self.integrality, bounds=self.bounds,
+                      constraints=LinearConstraint(self.A, lower, upper), options=options)
+        if result.x is None:
+            return None
+
+        outputs = (self.P @ result.x + self.p_constant).reshape(self.n_periods, self.n_generators).T
+        if self.commitment:
+            status = result.x[self.n_segments:].reshape(self.n_periods, self.n_generators).T > 0.5
+        else:
+            status = np.ones_like(outputs, dtype=bool)
+        return outputs, status
+
+
+# Backend name -> backend class, in order of preference
+BACKENDS = {'docplex': _DocplexBackend, 'slsqp': _SlsqpBackend, 'trust-constr': _ScipyBackend}
+
+
+def available_backends():
+    """Names of the OptimalPowerFlow backends whose solver is installed, in order of preference."""
+    return [name for name, backend in BACKENDS.items() if importlib.util.find_spec(backend.module) is not None]
+
+
+def _sweep(opf, demands, warm_start):
+    """
+    Solves an OptimalPowerFlow for each demand, updating only the demand of its model.
+
+    Returns:
+        list of dict: One row per demand with its 'objective', 'marginal_price', 'status' and 'solve_time'.
+    """
+    if opf.build_time is None:
+        opf.setup_problem()
+    lower = np.broadcast_to(np.asarray(opf.min_output, dtype=float), opf.num_generators)
+    upper = np.broadcast_to(np.asarray(opf.max_output, dtype=float), opf.num_generators)
+
+    rows, previous = [], None
+    for demand in demands:
+        opf.demand = demand
+        opf._backend.update_demand(demand)
+        x0 = None
+        if warm_start and previous is not None:
+            # The previous outputs, shifted evenly to the new demand
+            x0 = np.clip(previous + (demand - previous.sum()) / opf.num_generators, lower, upper)
+
+        start = time.perf_counter()
+        outputs, objective, marginal_price, _, status = opf._backend.solve(x0)
+        rows.append({'demand': demand, 'objective': objective, 'marginal_price': marginal_price, 'status': status,
+                     'solve_time': 1e3 * (time.perf_counter() - start)})
+        if status == 'optimal':
+            previous = outputs
+    return rows
+
+
+def _sweep_chunk(arguments, backend, demands, warm_start):
+    """Builds an OptimalPowerFlow in a worker process and sweeps a chunk of demands."""
+    return _sweep(OptimalPowerFlow(*arguments, backend=backend), demands, warm_start)
 
 
 class OptimalPowerFlow:
     """
-    A class to model and solve the Optimal Power Flow (OPF) problem using CPLEX.
+    A class to model and solve the Optimal Power Flow (OPF) problem.
 
     This class handles the setup and solution of an OPF problem, which involves
     optimizing the power output of several generators to minimize the total cost
     of electricity production while meeting a given power demand and respecting
     generator limits and transmission constraints.
 
+    The problem can be solved by CPLEX through docplex ('docplex' backend) or by the open-source
+    SLSQP ('slsqp' backend) or trust-constr ('trust-constr' backend) methods of SciPy, with analytic
+    derivatives.
+
     Attributes:
         num_generators (int): Number of generators.
         cost_coeffs (list of tuples): Coefficients (a, b, c) for the cost function of each generator.
         min_output (list of float): Minimum power output for each generator.
         max_output (list of float): Maximum power output for each generator.
         demand (float): Total power demand that must be met.
-        transmission_limits (dict): Max transmission capacity between each pair of generators.
+        transmission_limits: Max transmission capacity of each line between two generators, see
+            transmission_lines().
+        lines (tuple of numpy.ndarray): First generator, second generator and limit of each line.
+        backend (str): Name of the backend.
+        build_time (float): Time to set up the problem, in milliseconds.
+        solve_time (float): Time of the last solve, in milliseconds.
+        model (docplex.mp.model.Model): docplex model, with the 'docplex' backend only.
+        power (list): docplex output variables, with the 'docplex' backend only.
 
     Methods:
         setup_problem(): Sets up the optimization model with the necessary variables, objective, and constraints.
-        solve(): Solves the optimization model and prints the outputs and total cost.
+        solve(reporter=None): Solves the optimization model and returns an OPFResult.
+        sweep(demands): Solves the model for many demands and returns the supply curve.
 
     Example:
         >>> num_generators = 3
@@ -32,55 +444,439 @@ class OptimalPowerFlow:
         >>> transmission_limits = {('1', '2'): 50, ('1', '3'): 50, ('2', '3'): 30}
         >>> opf = OptimalPowerFlow(num_generators, cost_coeffs, min_output, max_output, demand, transmission_limits)
         >>> opf.setup_problem()
-        >>> opf.solve()
+        >>> result = opf.solve(reporter=print_result)
     """
 
-    def __init__(self, num_generators, cost_coeffs, min_output, max_output, demand, transmission_limits):
-        self.model = Model('OptimalPowerFlow')
+    def __init__(self, num_generators, cost_coeffs, min_output, max_output, demand, transmission_limits,
+                 backend=None):
+        """
+        Initialize an OptimalPowerFlow object.
+
+        Args:
+            backend (str, optional): 'docplex', 'slsqp' or 'trust-constr', keys of BACKENDS. Defaults to
+                the first available one.
+
+        Raises:
+            KeyError: If the backend is unknown.
+            ValueError: If no backend is available, or if a line has an invalid generator index.
+        """
+        if backend is None:
+            backends = available_backends()
+            if not backends:
+                raise ValueError("No OptimalPowerFlow backend is available")
+            backend = backends[0]
+        if backend not in BACKENDS:
+            raise KeyError(f'Unknown backend {backend}')
+
         self.num_generators = num_generators
         self.cost_coeffs = cost_coeffs
         self.min_output = min_output
         self.max_output = max_output
         self.demand = demand
         self.transmission_limits = transmission_limits
-        self.power = self.model.continuous_var_list(num_generators, lb=min_output, ub=max_output, name='Power')
+        self.lines = transmission_lines(transmission_limits, num_generators)
+        self.backend = backend
+        self.build_time = None
+        self.solve_time = None
+        self._backend = BACKENDS[backend](self)
+        if backend == 'docplex':
+            self.model = self._backend.model
+            self.power = self._backend.power
 
     def setup_problem(self):
         """Set up the optimization problem with decision variables, objective function, and constraints."""
-        # Objective: Minimize total cost
-        total_cost = self.model.sum(self.cost_coeffs[i][0] * self.power[i] ** 2 +
-                                    self.cost_coeffs[i][1] * self.power[i] +
-                                    self.cost_coeffs[i][2] for i in range(self.num_generators))
-        self.model.minimize(total_cost)
+        start = time.perf_counter()
+        self._backend.setup_problem()
+        self.build_time = 1e3 * (time.perf_counter() - start)
 
-        # Constraint: Demand must be met
-        self.model.add_constraint(self.model.sum(self.power) == self.demand, 'DemandSatisfaction')
+    def solve(self, reporter=None):
+        """
+        Solve the model.
 
-        # Constraints: Transmission limits
-        for i in range(self.num_generators):
-            for j in range(i + 1, self.num_generators):
-                self.model.add_constraint(self.model.abs(self.power[i] - self.power[j]) <=
-                                          self.transmission_limits[f'{i + 1}', f'{j + 1}'],
-                                          f'TransLimit_{i + 1}_{j + 1}')
+        Args:
+            reporter (callable, optional): Function called with the OPFResult, e.g. print_result() to display
+                the outputs and the total cost. Nothing is printed by default.
 
-    def solve(self):
-        """Solve the model and display the outputs and the total cost if the solution is found."""
-        solution = self.model.solve()
-        if solution:
-            print("Solution found:")
-            for i in range(self.num_generators):
-                print(f"Generator {i + 1} Output: {solution[self.power[i]]:.2f} MW")
-            print(f"Total Generation Cost: ${solution.get_objective_value():.2f}")
+        Returns:
+            OPFResult: Outputs, objective, duals, status and timings.
+        """
+        start = time.perf_counter()
+        outputs, objective, marginal_price, line_duals, status = self._backend.solve()
+        self.solve_time = 1e3 * (time.perf_counter() - start)
+
+        result = OPFResult(outputs, objective, marginal_price, line_duals, status, self.build_time,
+                           self.solve_time)
+        if reporter is not None:
+            reporter(result)
+        return result
+
+    def sweep(self, demands, warm_start=True, max_workers=1):
+        """
+        Solve the model for many demands, e.g. to build a supply curve.
+
+        The model is built once, and only the right-hand side of the DemandSatisfaction constraint changes
+        between solves. With warm starts, the SciPy backends start from the previous solution shifted to the
+        new demand, so the demands are best sorted; CPLEX reuses its previous solution by itself. With several
+        workers, the demands are split into contiguous chunks, each swept by a model built in its process.
+
+        Args:
+            demands (array_like): Demand levels.
+            warm_start (bool, optional): Whether to start each solve from the previous solution.
+            max_workers (int, optional): Number of worker processes; 1 solves in this process and None uses
+                the number of CPUs.
+
+        Returns:
+            pandas.DataFrame: One row per demand, in order, with its 'objective', 'marginal_price', 'status'
+            and 'solve_time' in milliseconds, the status being that of OPFResult. The objective is NaN
+            without a solution and the price is NaN unless the status is 'optimal'.
+        """
+        demands = np.atleast_1d(np.asarray(demands, dtype=float)).tolist()
+        n_workers = min(os.cpu_count() if max_workers is None else max_workers, len(demands))
+
+        if n_workers <= 1:
+            demand = self.demand
+            try:
+                rows = _sweep(self, demands, warm_start)
+            finally:
+                self.demand = demand
+                if self.build_time is not None:
+                    self._backend.update_demand(demand)
         else:
-            print("No solution found")
+            arguments = (self.num_generators, self.cost_coeffs, self.min_output, self.max_output, self.demand,
+                         self.transmission_limits)
+            chunks = np.array_split(np.arange(len(demands)), n_workers)
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                futures = [executor.submit(_sweep_chunk, arguments, self.backend,
+                                           [demands[i] for i in chunk], warm_start) for chunk in chunks]
+                rows = [row for future in futures for row in future.result()]
+
+        table = pd.DataFrame(rows, columns=['demand', 'objective', 'marginal_price', 'status', 'solve_time'])
+        return table.astype({'objective': float, 'marginal_price': float})
+
+    def dispatch(self, demand, ramp_rate=None, commitment=False, segments=10, window=None, step=None,
+                 initial_output=None, options=None):
+        """
+        Dispatch the generators over many periods, with ramping limits and optional unit commitment.
+
+        Every period has its own demand, and the transmission limits apply to every period. The problem is
+        solved by scipy.optimize.milp (HiGHS) with the quadratic costs interpolated over piecewise-linear
+        segments, whose breakpoints are exact. With commitment, each generator may be off, with zero output,
+        or on between its minimum and maximum output; ramping then also limits start-ups and shut-downs.
+
+        Long horizons are solved with a rolling horizon: windows of `window` periods are solved in sequence,
+        each keeping its first `step` periods and starting from the last kept outputs, for the ramping
+        limits. The constraint matrix is built once per window length, so memory is bounded by the window.
 
+        Args:
+            demand (array_like): Demand of each period.
+            ramp_rate (float or array_like, optional): Maximum change of output of each generator between
+                two periods. Defaults to no ramping limit.
+            commitment (bool, optional): Whether generators can be switched off, with binary variables.
+            segments (int, optional): Number of piecewise-linear segments of each cost.
+            window (int, optional): Number of periods per window. Defaults to the whole horizon.
+            step (int, optional): Number of periods kept from each window. Defaults to the window.
+            initial_output (array_like, optional): Outputs before the first period, for the ramping limits.
+            options (dict, optional): Options of scipy.optimize.milp, e.g. {'time_limit': 10}.
+
+        Returns:
+            dict: 'outputs' and on/off 'status' with shape (num_generators, n_periods), the exact quadratic
+            'cost' of each period and the 'total_cost'.
+
+        Raises:
+            ValueError: If no feasible dispatch is found for a window, or if the step exceeds the window.
+        """
+        demand = np.asarray(demand, dtype=float)
+        n_periods = len(demand)
+        window = n_periods if window is None else window
+        step = window if step is None else step
+        if not 0 < step <= window:
+            raise ValueError(f"The step must be in [1, window], got {step}")
+
+        outputs = np.empty((self.num_generators, n_periods))
+        status = np.empty((self.num_generators, n_periods), dtype=bool)
+        models = {}
+        previous = None if initial_output is None else np.asarray(initial_output, dtype=float)
+        for start in range(0, n_periods, step):
+            length = min(window, n_periods - start)
+            if length not in models:
+                models[length] = _DispatchWindow(self, length, ramp_rate, commitment, segments)
+            solution = models[length].solve(demand[start:start + length], previous, options)
+            if solution is None:
+                raise ValueError(f"No feasible dispatch was found in the window starting at period {start}")
+
+            keep = min(step, length)
+            outputs[:, start:start + keep] = solution[0][:, :keep]
+            status[:, start:start + keep] = solution[1][:, :keep]
+            previous = outputs[:, start + keep - 1]
+
+        a, b, c = np.asarray(self.cost_coeffs, dtype=float).reshape(self.num_generators, 3).T
+        cost = (status * (a[:, None] * outputs ** 2 + b[:, None] * outputs + c[:, None])).sum(axis=0)
+        return {'outputs': outputs, 'status': status, 'cost': cost, 'total_cost': cost.sum()}
+
+
+def compare_backends(num_generators, cost_coeffs, min_output, max_output, demand, transmission_limits,
+                     backends=None):
+    """
+    Solve the same OPF with several backends and report their costs and timings.
+
+    The arguments before backends are those of OptimalPowerFlow.
+
+    Args:
+        backends (list of str, optional): Names of the backends. Defaults to the available ones.
+
+    Returns:
+        pandas.DataFrame: One row per backend with its 'objective', 'build_time' and 'solve_time' in
+        milliseconds, sorted by total time.
+    """
+    rows = []
+    for backend in available_backends() if backends is None else backends:
+        opf = OptimalPowerFlow(num_generators, cost_coeffs, min_output, max_output, demand, transmission_limits,
+                               backend=backend)
+        opf.setup_problem()
+        result = opf.solve()
+        rows.append({'backend': backend, 'objective': result.objective, 'build_time': result.build_time,
+                     'solve_time': result.solve_time})
+
+    table = pd.DataFrame(rows, columns=['backend', 'objective', 'build_time', 'solve_time'])
+    order = np.argsort((table['build_time'] + table['solve_time']).to_numpy(), kind='stable')
+    return table.iloc[order].reset_index(drop=True)
 
 
 # Objective function (power loss)
 def power_loss(d, rho, L, I):
+    """
+    Joule loss of a cable with a circular cross-section.
+
+    All arguments broadcast together, so the losses of many cables are evaluated in one call.
+
+    Args:
+        d (float or numpy.ndarray): Diameter of the conductor, in meters.
+        rho (float or numpy.ndarray): Resistivity of the conductor, in ohm meters.
+        L (float or numpy.ndarray): Length of the cable, in meters.
+        I (float or numpy.ndarray): Current, in amperes.
+
+    Returns:
+        float or numpy.ndarray: Power loss, in watts.
+    """
     A = np.pi * (d**2) / 4  # cross-sectional area in square meters
     R = rho * L / A  # resistance in ohms
     P = I**2 * R  # power loss in watts
     return P
 
 
+def thermal_min_diameter(I, rho, h, delta_T):
+    """
+    Smallest diameter keeping the steady-state temperature rise of a conductor within a limit.
+
+    The Joule heat per unit length, 4 I^2 rho / (pi d^2), must not exceed the heat h pi d delta_T
+    removed from the surface, hence d^3 >= 4 I^2 rho / (pi^2 h delta_T).
+
+    Args:
+        I (float or numpy.ndarray): Current, in amperes.
+        rho (float or numpy.ndarray): Resistivity of the conductor, in ohm meters.
+        h (float or numpy.ndarray): Heat transfer coefficient of the surface, in W/(m^2 K).
+        delta_T (float or numpy.ndarray): Maximum temperature rise, in kelvins.
+
+    Returns:
+        float or numpy.ndarray: Minimum diameter, in meters.
+    """
+    return np.cbrt(4 * I**2 * rho / (np.pi**2 * h * delta_T))
+
+
+def size_cables(I, rho, L, d_min, d_max, h=None, delta_T=None, J_max=None, loss_cost=None, material_cost=None):
+    """
+    Choose the diameters of many cables at once, in closed form.
+
+    The loss decreases with the diameter, so without material cost the optimum is the largest diameter.
+    With a cost per watt of loss w and a cost per cubic meter of conductor m, the cost
+    w power_loss(d) + m L pi d^2 / 4 is convex in d and minimal at d^4 = 16 w I^2 rho / (pi^2 m). The
+    diameter is then raised to the ampacity limits, thermal (h, delta_T) and current density (J_max), and to
+    d_min. A cable is infeasible if these limits exceed d_max, in which case d_max is returned.
+
+    All arguments broadcast together, e.g. arrays of currents with scalar limits.
+
+    Args:
+        I (float or numpy.ndarray): Current, in amperes.
+        rho (float or numpy.ndarray): Resistivity of the conductor, in ohm meters.
+        L (float or numpy.ndarray): Length of the cable, in meters.
+        d_min (float or numpy.ndarray): Minimum diameter, in meters.
+        d_max (float or numpy.ndarray): Maximum diameter, in meters.
+        h (float or numpy.ndarray, optional): Heat transfer coefficient for the thermal limit, in W/(m^2 K).
+        delta_T (float or numpy.ndarray, optional): Maximum temperature rise for the thermal limit, in kelvins.
+        J_max (float or numpy.ndarray, optional): Maximum current density, in A/m^2.
+        loss_cost (float or numpy.ndarray, optional): Cost per watt of loss.
+        material_cost (float or numpy.ndarray, optional): Cost per cubic meter of conductor.
+
+    Returns:
+        dict: Arrays of the chosen 'diameter', its 'power_loss', 'feasible' and, with loss and material
+        costs, the 'total_cost'.
+
+    Raises:
+        ValueError: If only one of h and delta_T, or of loss_cost and material_cost, is given.
+    """
+    if (h is None) != (delta_T is None):
+        raise ValueError("The thermal limit needs both h and delta_T")
+    if (loss_cost is None) != (material_cost is None):
+        raise ValueError("The economic diameter needs both loss_cost and material_cost")
+
+    I, rho, L, d_min, d_max = np.broadcast_arrays(*(np.asarray(value, dtype=float)
+                                                    for value in (I, rho, L, d_min, d_max)))
+    lower = d_min
+    if h is not None:
+        lower = np.maximum(lower, thermal_min_diameter(I, rho, h, delta_T))
+    if J_max is not None:
+        lower = np.maximum(lower, np.sqrt(4 * np.abs(I) / (np.pi * J_max)))
+
+    if loss_cost is None:
+        diameter = d_max.copy()
+    else:
+        diameter = np.sqrt(4 * np.abs(I) * np.sqrt(rho * loss_cost / material_cost) / np.pi)
+    feasible = lower <= d_max
+    diameter = np.minimum(np.maximum(diameter, lower), d_max)
+
+    result = {'diameter': diameter, 'power_loss': power_loss(diameter, rho, L, I), 'feasible': feasible}
+    if loss_cost is not None:
+        result['total_cost'] = loss_cost * result['power_loss'] + material_cost * L * np.pi * diameter**2 / 4
+    return result
+
+
+class FeederNetwork:
+    """
+    Radial feeder network whose cable diameters are chosen from a discrete catalogue.
+
+    The network is a forest of edges directed away from the supply points, stored in CSR form: the edges
+    leaving node n are ``edges[indptr[n]:indptr[n + 1]]``. Edges are also grouped by depth into levels, so
+    that the tree is traversed with one vectorized step per level rather than one per edge.
+
+    Attributes:
+        source (numpy.ndarray): Upstream node of each edge.
+        target (numpy.ndarray): Downstream node of each edge.
+        length (numpy.ndarray): Length of each edge, in meters.
+        current (numpy.ndarray): Current carried by each edge, in amperes.
+        indptr (numpy.ndarray): CSR row pointers, by node.
+        edges (numpy.ndarray): Edges sorted by upstream node.
+        parent (numpy.ndarray): Upstream edge of each edge, -1 at a supply point.
+        levels (list of numpy.ndarray): Edges by depth, from the supply points downwards.
+
+    Example:
+        >>> network = FeederNetwork([0, 1, 1], [1, 2, 3], [100., 50., 80.], load=[0., 0., 20., 30.])
+        >>> network.current
+        array([50., 20., 30.])
+        >>> network.size([0.005, 0.01, 0.02], 1.68e-8, loss_cost=5., material_cost=9e4)['diameter']
+        array([0.01 , 0.005, 0.005])
+    """
+
+    def __init__(self, source, target, length, current=None, load=None):
+        """
+        Initialize a FeederNetwork object.
+
+        Args:
+            source (array_like): Upstream node of each edge, as integers.
+            target (array_like): Downstream node of each edge, as integers.
+            length (array_like): Length of each edge, in meters.
+            current (array_like, optional): Current of each edge, in amperes.
+            load (array_like, optional): Current drawn at each node, in amperes; the current of an edge is
+                then the load of all the nodes downstream of it. Required if current is not given.
+
+        Raises:
+            ValueError: If the edges do not form a forest directed away from its roots, or if neither the
+                currents nor the loads are given.
+        """
+        self.source = np.asarray(source, dtype=np.int64)
+        self.target = np.asarray(target, dtype=np.int64)
+        self.length = np.broadcast_to(np.asarray(length, dtype=float), self.source.shape)
+        n_edges = len(self.source)
+        n_nodes = int(max(self.source.max(), self.target.max())) + 1 if n_edges else 0
+
+        if len(np.unique(self.target)) != n_edges:
+            raise ValueError("Every node must have at most one upstream edge")
+        incoming = np.full(n_nodes, -1)
+        incoming[self.target] = np.arange(n_edges)
+        self.parent = incoming[self.source]
+
+        self.edges = np.argsort(self.source, kind='stable')
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(self.source, minlength=n_nodes))])
+
+        self.levels = []
+        level = np.flatnonzero(self.parent < 0)
+        visited = 0
+        while len(level):
+            self.levels.append(level)
+            visited += len(level)
+            level = self._children(self.target[level])
+        if visited != n_edges:
+            raise ValueError("The edges contain a cycle")
+
+        if current is not None:
+            self.current = np.broadcast_to(np.asarray(current, dtype=float), self.source.shape)
+        elif load is not None:
+            self.current = np.asarray(load, dtype=float)[self.target]
+            for level in reversed(self.levels[1:]):
+                np.add.at(self.current, self.parent[level], self.current[level])
+        else:
+            raise ValueError("Either the currents or the loads must be given")
+
+    def _children(self, nodes):
+        """Edges leaving the given nodes, gathered from the CSR arrays."""
+        starts, stops = self.indptr[nodes], self.indptr[nodes + 1]
+        counts = stops - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return self.edges[offsets + np.arange(counts.sum())]
+
+    def size(self, diameters, rho, loss_cost, material_cost, ampacity=None, monotone=True):
+        """
+        Choose the diameter of every edge to minimize the total cost of losses and conductor.
+
+        The cost of an edge is loss_cost * power_loss() + material_cost * volume. With monotone diameters,
+        an edge may not be thicker than its upstream edge, and the problem is solved exactly by dynamic
+        programming over the tree. Upwards, level by level, best[e, k] is the cost of the subtree of edge e
+        when e uses catalogue size k, and a parent using size k adds the running minimum of best[child, :k + 1]
+        of each child. Downwards, each edge takes the best size allowed by the size of its parent.
+
+        Args:
+            diameters (array_like): Catalogue of diameters, in meters.
+            rho (float): Resistivity of the conductor, in ohm meters.
+            loss_cost (float): Cost per watt of loss.
+            material_cost (float): Cost per cubic meter of conductor.
+            ampacity (array_like, optional): Maximum current of each catalogue diameter, in amperes.
+            monotone (bool, optional): Whether diameters may not increase downstream.
+
+        Returns:
+            dict: 'diameter', catalogue 'index' and 'power_loss' of each edge, and 'total_cost'.
+
+        Raises:
+            ValueError: If no catalogue diameter satisfies the ampacity constraints.
+        """
+        diameters = np.asarray(diameters, dtype=float)
+        order = np.argsort(diameters, kind='stable')
+        diameters = diameters[order]
+
+        cost = loss_cost * power_loss(diameters, rho, self.length[:, None], self.current[:, None]) + \
+            material_cost * self.length[:, None] * np.pi * diameters**2 / 4
+        if ampacity is not None:
+            cost[np.abs(self.current[:, None]) > np.asarray(ampacity, dtype=float)[order]] = np.inf
+
+        if monotone:
+            best = cost.copy()
+            for level in reversed(self.levels[1:]):
+                np.add.at(best, self.parent[level], np.minimum.accumulate(best[level], axis=1))
+
+            choice = np.empty(len(self.source), dtype=np.int64)
+            roots = self.levels[0] if self.levels else np.empty(0, dtype=np.int64)
+            choice[roots] = best[roots].argmin(axis=1)
+            columns = np.arange(len(diameters))
+            for level in self.levels[1:]:
+                running = np.minimum.accumulate(best[level], axis=1)
+                argmin = np.maximum.accumulate(np.where(best[level] == running, columns, 0), axis=1)
+                choice[level] = argmin[np.arange(len(level)), choice[self.parent[level]]]
+            total_cost = best[roots, choice[roots]].sum()
+        else:
+            choice = cost.argmin(axis=1)
+            total_cost = cost[np.arange(len(choice)), choice].sum()
+
+        if not np.isfinite(total_cost):
+            raise ValueError("No catalogue diameter satisfies the ampacity of every edge")
+
+        diameter = diameters[choice]
+        return {'diameter': diameter, 'index': order[choice],
+                'power_loss': power_loss(diameter, rho, self.length, self.current), 'total_cost': total_cost}
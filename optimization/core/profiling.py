@@ -0,0 +1,217 @@
+import functools
+import itertools
+import json
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+
+class _MemoryTracer:
+    """
+    Nesting-aware, thread-safe wrapper around tracemalloc.
+
+    Tracing is started by the first open frame and stopped by the last one, unless it was already running.
+    tracemalloc only keeps a single process-wide peak, so every time a frame is opened or closed the peak
+    reached so far is folded into all the open frames before being reset. Each frame thus sees the peak of
+    traced memory over its own lifetime, whatever frames were opened and closed inside it. Allocations
+    made by other threads while a frame is open are counted as well.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frames = []
+        self._owns_tracing = False
+
+    def enter(self):
+        """Open a frame and return it; to be passed to exit()."""
+        with self._lock:
+            if not self._frames and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracing = True
+            current = self._fold_peak()
+            frame = [current, current]  # [memory at entry, peak since entry]
+            self._frames.append(frame)
+            return frame
+
+    def exit(self, frame):
+        """
+        Close a frame.
+
+        Returns:
+            tuple: Memory allocated since entry and still alive, and peak memory allocated since entry,
+            in bytes.
+        """
+        with self._lock:
+            current = self._fold_peak()
+            self._frames.remove(frame)
+            if not self._frames and self._owns_tracing:
+                tracemalloc.stop()
+                self._owns_tracing = False
+            base, peak = frame
+            return max(current - base, 0), max(peak - base, 0)
+
+    def _fold_peak(self):
+        current, peak = tracemalloc.get_traced_memory()
+        for frame in self._frames:
+            frame[1] = max(frame[1], peak)
+        tracemalloc.reset_peak()
+        return current
+
+
+MEMORY_TRACER = _MemoryTracer()
+
+
+class FunctionStats:
+    """Aggregated timing and memory statistics of a profiled function."""
+
+    def __init__(self, name, max_samples=10_000):
+        """
+        Initialize a FunctionStats object.
+
+        Args:
+            name (str): Name of the profiled function.
+            max_samples (int): Number of most recent durations kept to compute percentiles.
+        """
+        self.name = name
+        self.max_samples = max_samples
+        self.clear()
+
+    def clear(self):
+        """Forget every recorded call."""
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.durations_ns = deque(maxlen=self.max_samples)
+        self.histogram = {}  # duration bucket [2**(k-1), 2**k) ns -> number of calls
+        self.memory_samples = 0
+        self.peak_memory = 0
+
+    def record(self, duration_ns, peak_memory=None):
+        """Add one call to the statistics."""
+        self.count += 1
+        self.total_ns += duration_ns
+        self.max_ns = max(self.max_ns, duration_ns)
+        self.durations_ns.append(duration_ns)
+        bucket = duration_ns.bit_length()
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+        if peak_memory is not None:
+            self.memory_samples += 1
+            self.peak_memory = max(self.peak_memory, peak_memory)
+
+    def summary(self):
+        """
+        Summarize the statistics.
+
+        Returns:
+            dict: Number of calls, mean, percentiles and maximum of the durations in milliseconds, the
+            histogram of durations and the largest peak memory in bytes over the sampled calls.
+        """
+        p50, p95, p99 = np.percentile(self.durations_ns, [50, 95, 99]) / 1e6 if self.count else (np.nan,) * 3
+        return {
+            'count': self.count,
+            'mean_ms': self.total_ns / self.count / 1e6 if self.count else np.nan,
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'max_ms': self.max_ns / 1e6,
+            'histogram_ns': {f'<{2 ** bucket}': n for bucket, n in sorted(self.histogram.items())},
+            'memory_samples': self.memory_samples,
+            'peak_memory': self.peak_memory,
+        }
+
+
+class Profiler:
+    """
+    Registry of per-function profiling statistics.
+
+    Example:
+        >>> profiler = Profiler()
+        >>> @profiler.profile(sample_every=100)
+        ... def solve(n):
+        ...     return sum(range(n))
+        >>> solve(1000)
+        >>> profiler.summary()['solve']['p50_ms']
+        >>> profiler.dump('profile.json')
+    """
+
+    def __init__(self, max_samples=10_000):
+        """
+        Initialize a Profiler object.
+
+        Args:
+            max_samples (int): Number of most recent durations kept per function to compute percentiles.
+        """
+        self.max_samples = max_samples
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def profile(self, func=None, *, name=None, sample_every=1):
+        """
+        Decorator that records the duration of every call and the peak memory of one call in N.
+
+        Can be used both as ``@profiler.profile`` and ``@profiler.profile(sample_every=100)``.
+
+        Args:
+            func (function): The function to be wrapped by the decorator.
+            name (str, optional): Name under which the statistics are registered. Defaults to the
+                qualified name of the function.
+            sample_every (int): Memory is traced on one call in sample_every; 0 disables memory tracing.
+
+        Returns:
+            function: The wrapped function, whose results are returned unchanged.
+        """
+        if func is None:
+            return functools.partial(self.profile, name=name, sample_every=sample_every)
+
+        stats = self._get_stats(name or func.__qualname__)
+        calls = itertools.count()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = sample_every and next(calls) % sample_every == 0
+            frame = MEMORY_TRACER.enter() if trace else None
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                duration = time.perf_counter_ns() - start
+                peak = MEMORY_TRACER.exit(frame)[1] if trace else None
+                with self._lock:
+                    stats.record(duration, peak)
+
+        return wrapper
+
+    def summary(self):
+        """
+        Summarize the statistics of every profiled function.
+
+        Returns:
+            dict: Function name -> FunctionStats.summary().
+        """
+        with self._lock:
+            return {name: stats.summary() for name, stats in self.stats.items()}
+
+    def dump(self, path):
+        """Write the summary of every profiled function to a JSON file."""
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def reset(self):
+        """Forget the statistics of every profiled function."""
+        with self._lock:
+            for stats in self.stats.values():
+                stats.clear()
+
+    def _get_stats(self, name):
+        with self._lock:
+            if name not in self.stats:
+                self.stats[name] = FunctionStats(name, self.max_samples)
+            return self.stats[name]
+
+
+# Default registry
+PROFILER = Profiler()
+profile = PROFILER.profile
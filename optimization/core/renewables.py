@@ -1,7 +1,19 @@
+import os
+from collections import namedtuple
+
 import numpy as np
+import pandas as pd
 from pydantic import BaseModel
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, linprog, minimize
 import math
 
+TransportProblem = namedtuple('TransportProblem', ['c', 'A_ub', 'b_ub', 'A_eq', 'b_eq', 'shape'])
+TransportProblem.__doc__ = """
+Linear program of the energy distribution: minimize ``c @ x`` subject to ``A_ub @ x <= b_ub``,
+``A_eq @ x == b_eq`` and ``x >= 0``, where ``x.reshape(shape)[i, j]`` is the flow from source i to consumer j.
+"""
+
 
 class ConsumerModel(BaseModel):
     """Data model representing a consumer."""
@@ -20,6 +32,8 @@ class SourceModel(BaseModel):
 class EnergySource:
     """Represents an energy source."""
 
+    __slots__ = ('name', 'capacity', 'cost_per_unit', 'unit')
+
     def __init__(self, name, capacity, cost_per_unit, unit='kW'):
         """
         Initialize an EnergySource object.
@@ -39,6 +53,8 @@ class EnergySource:
 class Consumer:
     """Represents a consumer."""
 
+    __slots__ = ('name', 'demand')
+
     def __init__(self, name, demand):
         """
         Initialize a Consumer object.
@@ -51,6 +67,89 @@ class Consumer:
         self.demand = demand
 
 
+class _ColumnStore:
+    """Named rows stored as growable NumPy columns, with a name to row index map."""
+
+    def __init__(self, **dtypes):
+        """
+        Args:
+            **dtypes: Data type of each column, by column name.
+        """
+        self.index = {}
+        self._columns = {column: np.empty(0, dtype=dtype) for column, dtype in dtypes.items()}
+        self._records = None  # Cached records(), until the next extend() or update()
+
+    def __len__(self):
+        return len(self.index)
+
+    def column(self, column):
+        """Read-only view of the filled part of a column."""
+        view = self._columns[column][:len(self)]
+        view.flags.writeable = False
+        return view
+
+    def extend(self, names, **values):
+        """
+        Append rows, growing the columns geometrically so that repeated appends are amortized.
+
+        Args:
+            names (iterable): Name of each row.
+            **values: Values of each row, by column name; scalars are broadcast.
+
+        Raises:
+            KeyError: If a name already exists or is repeated.
+        """
+        names = list(names)
+        if len(set(names)) != len(names) or not self.index.keys().isdisjoint(names):
+            duplicate = next(name for i, name in enumerate(names) if name in self.index or name in names[:i])
+            raise KeyError(f'The key {duplicate} exists already')
+
+        start = len(self)
+        stop = start + len(names)
+        for column, array in self._columns.items():
+            if stop > len(array):
+                grown = np.empty(max(stop, 2 * len(array), 16), dtype=array.dtype)
+                grown[:start] = array[:start]
+                self._columns[column] = array = grown
+            array[start:stop] = values[column]
+        self.index.update(zip(names, range(start, stop)))
+        self._records = None
+
+    def update(self, name, **values):
+        """
+        Overwrite values of an existing row.
+
+        Args:
+            name: Name of the row.
+            **values: New values, by column name.
+
+        Returns:
+            int: Index of the row.
+
+        Raises:
+            KeyError: If the name does not exist.
+        """
+        if name not in self.index:
+            raise KeyError(f'The key {name} does not exist')
+        i = self.index[name]
+        for column, value in values.items():
+            self._columns[column][i] = value
+        self._records = None
+        return i
+
+    def records(self):
+        """
+        Rows as a dictionary of dictionaries, keyed by name in insertion order.
+
+        The dictionary is built once and shared until the rows change, so it must not be modified.
+        """
+        if self._records is None:
+            columns = {column: self.column(column).tolist() for column in self._columns}
+            self._records = {name: {column: values[i] for column, values in columns.items()}
+                             for name, i in self.index.items()}
+        return self._records
+
+
 class EnergyDistribution:
     """Manages energy sources, consumers, and flows."""
 
@@ -60,16 +159,57 @@ class EnergyDistribution:
         self.D_A = None
         self.W_max = None
         self.S_max = None
-        self.n_consumers = None
-        self.n_sources = None
-        self.sources = {}  # Dictionary to store energy sources
-        self.consumers = {}  # Dictionary to store consumers
+        self._sources = _ColumnStore(capacity=float, cost_per_unit=float, unit=object)
+        self._consumers = _ColumnStore(demand=float)
+        self._problem = None  # Cached (edge costs, TransportProblem)
+        self._last_solve = None  # Solver, arguments and flows of the last solve, see resolve()
+
+    @property
+    def sources(self):
+        """
+        dict: Snapshot of the energy sources, as {name: {'capacity', 'cost_per_unit', 'unit'}}.
+
+        The snapshot is cached until the next add or update and must not be modified.
+        """
+        return self._sources.records()
+
+    @property
+    def consumers(self):
+        """
+        dict: Snapshot of the consumers, as {name: {'demand'}}.
+
+        The snapshot is cached until the next add or update and must not be modified.
+        """
+        return self._consumers.records()
+
+    @property
+    def n_sources(self):
+        return len(self._sources)
+
+    @property
+    def n_consumers(self):
+        return len(self._consumers)
+
+    @property
+    def capacity(self):
+        """numpy.ndarray: Capacity of each source, in insertion order."""
+        return self._sources.column('capacity')
+
+    @property
+    def cost_per_unit(self):
+        """numpy.ndarray: Cost per unit of each source, in insertion order."""
+        return self._sources.column('cost_per_unit')
+
+    @property
+    def demand(self):
+        """numpy.ndarray: Demand of each consumer, in insertion order."""
+        return self._consumers.column('demand')
 
     def read_max_values(self):
-        self.S_max = self.sources['Solar']['capacity']
-        self.W_max = self.sources['Wind']['capacity']
-        self.D_A = self.consumers['A']['demand']
-        self.D_B = self.consumers['B']['demand']
+        self.S_max = self.capacity[self._sources.index['Solar']]
+        self.W_max = self.capacity[self._sources.index['Wind']]
+        self.D_A = self.demand[self._consumers.index['A']]
+        self.D_B = self.demand[self._consumers.index['B']]
 
     def add_source(self, source):
         """
@@ -81,14 +221,9 @@ class EnergyDistribution:
         Raises:
             KeyError: If the key (source name) already exists in the sources' dictionary.
         """
-        if source.name in self.sources.keys():
-            raise KeyError(f'The key {source.name} exists already')
-
-        self.sources[source.name] = {'capacity': source.capacity,
-                                     'cost_per_unit': source.cost_per_unit,
-                                     'unit': source.unit}
-
-        self.n_sources = len(self.sources)
+        self._sources.extend([source.name], capacity=source.capacity, cost_per_unit=source.cost_per_unit,
+                             unit=source.unit)
+        self._problem = None
 
         return
 
@@ -102,29 +237,368 @@ class EnergyDistribution:
         Raises:
             KeyError: If the key (consumer name) already exists in the consumers' dictionary.
         """
-        if consumer.name in self.consumers.keys():
-            raise KeyError(f'The key {consumer.name} exists already')
+        self._consumers.extend([consumer.name], demand=consumer.demand)
+        self._problem = None
+
+        return
+
+    def add_sources(self, data):
+        """
+        Add many energy sources at once.
 
-        self.consumers[consumer.name] = {'demand': consumer.demand}
-        self.n_consumers = len(self.consumers)
+        Args:
+            data (pandas.DataFrame or dict): Columns 'name', 'capacity' and 'cost_per_unit' and, optionally,
+                'unit' (default: 'kW'), as a DataFrame or a dictionary of arrays.
+
+        Raises:
+            KeyError: If a source name already exists or is repeated.
+        """
+        self._sources.extend(np.asarray(data['name']).tolist(),
+                             capacity=np.asarray(data['capacity'], dtype=float),
+                             cost_per_unit=np.asarray(data['cost_per_unit'], dtype=float),
+                             unit=np.asarray(data['unit'], dtype=object) if 'unit' in data else 'kW')
+        self._problem = None
 
         return
 
-    def demand_constraint(self, x):
-        constraints = []
-        for consumer_name, consumer_data in self.consumers.items():
-            demand = consumer_data['demand']
-            total_flow = sum(x[source_name][consumer_name] for source_name in self.sources)
-            constraints.append(demand - total_flow)
-        return constraints
-
-    def capacity_constraint(self, x):
-        constraints = []
-        for source_name, source_data in self.sources.items():
-            capacity = source_data['capacity']
-            total_flow = sum(x[source_name][consumer_name] for consumer_name in self.consumers)
-            constraints.append(capacity - total_flow)
-        return constraints
+    def add_consumers(self, data):
+        """
+        Add many consumers at once.
+
+        Args:
+            data (pandas.DataFrame or dict): Columns 'name' and 'demand', as a DataFrame or a dictionary of arrays.
+
+        Raises:
+            KeyError: If a consumer name already exists or is repeated.
+        """
+        self._consumers.extend(np.asarray(data['name']).tolist(), demand=np.asarray(data['demand'], dtype=float))
+        self._problem = None
+
+        return
+
+    def update_demand(self, name, demand):
+        """
+        Change the demand of a consumer, e.g. before resolve().
+
+        Only the demand row of the cached transport problem is updated. The flows of the last solution to
+        this consumer are rescaled to the new demand, so that they remain a good starting point.
+
+        Args:
+            name (str): Name of the consumer.
+            demand (float): New demand of the consumer.
+
+        Raises:
+            KeyError: If the consumer does not exist.
+        """
+        previous = self.demand[self._consumers.index[name]] if name in self._consumers.index else None
+        j = self._consumers.update(name, demand=demand)
+        if self._problem is not None:
+            self._problem[1].b_eq[j] = demand
+        if self._last_solve is not None and self._last_solve['flows'].shape == (self.n_sources, self.n_consumers):
+            flows = self._last_solve['flows']
+            if previous > 0:
+                flows[:, j] *= demand / previous
+            else:
+                flows[:, j] = demand * self.capacity / self.capacity.sum()
+
+    def update_capacity(self, name, capacity):
+        """
+        Change the capacity of a source, e.g. before resolve().
+
+        Only the capacity row of the cached transport problem is updated.
+
+        Args:
+            name (str): Name of the source.
+            capacity (float): New capacity of the source.
+
+        Raises:
+            KeyError: If the source does not exist.
+        """
+        i = self._sources.update(name, capacity=capacity)
+        if self._problem is not None:
+            self._problem[1].b_ub[i] = capacity
+
+    def resolve(self):
+        """
+        Solve again with the solver and arguments of the last solve() or solve_transport() call.
+
+        The cached transport problem, updated row by row by update_demand() and update_capacity(), is
+        reused, and solve() starts from the last solution instead of the default initial flows.
+
+        Returns:
+            dict: As returned by the last solver.
+
+        Raises:
+            ValueError: If nothing was solved yet, or if the problem cannot be solved.
+        """
+        if self._last_solve is None:
+            raise ValueError("Nothing to re-solve: call solve() or solve_transport() first")
+
+        last = self._last_solve
+        if last['solver'] == 'solve':
+            x0 = last['flows'] if last['flows'].shape == (self.n_sources, self.n_consumers) else None
+            return self.solve(x0=x0, method=last['method'], options=last['options'])
+        return self.solve_transport(last['edge_costs'], method=last['method'])
+
+    def flow_array(self, source_flows):
+        """
+        Convert flows to an array with shape (..., n_sources, n_consumers).
+
+        Arrays are laid out source x consumer, as in transport_problem(). This is the transpose of the
+        consumer x source solutions of cost_function(), sample_solutions() and generate_many_solutions(),
+        which must be passed as ``solutions.swapaxes(-1, -2)``: with as many sources as consumers, both
+        layouts have the same shape and cannot be told apart.
+
+        Args:
+            source_flows (dict or array_like): Flows as {source: {consumer: flow}}, or as an array whose
+                trailing dimensions are (n_sources, n_consumers) or n_sources * n_consumers, source-major.
+
+        Returns:
+            numpy.ndarray: Flows with shape (..., n_sources, n_consumers).
+        """
+        if isinstance(source_flows, dict):
+            return np.array([[source_flows[source][consumer] for consumer in self._consumers.index]
+                             for source in self._sources.index], dtype=float)
+        source_flows = np.asarray(source_flows, dtype=float)
+        if source_flows.shape[-2:] != (self.n_sources, self.n_consumers):
+            source_flows = source_flows.reshape(source_flows.shape[:-1] + (self.n_sources, self.n_consumers))
+        return source_flows
+
+    def demand_constraint(self, source_flows):
+        """
+        Unmet demand of each consumer, with shape (..., n_consumers); zero when the demand is met.
+
+        Args:
+            source_flows (dict or array_like): Flows laid out source x consumer, see flow_array().
+        """
+        return self.demand - self.flow_array(source_flows).sum(axis=-2)
+
+    def capacity_constraint(self, source_flows):
+        """
+        Spare capacity of each source, with shape (..., n_sources); non-negative when feasible.
+
+        Args:
+            source_flows (dict or array_like): Flows laid out source x consumer, see flow_array().
+        """
+        return self.capacity - self.flow_array(source_flows).sum(axis=-1)
+
+    def transport_problem(self, edge_costs=None):
+        """
+        Build the general transport problem between all the sources and consumers.
+
+        Sources and consumers are indexed in insertion order. The flow from source i to consumer j is the
+        variable ``i * n_consumers + j``; one equality row per consumer enforces its demand and one
+        inequality row per source its capacity. The constraint matrices are sparse, with a single
+        non-zero entry per variable and row type.
+
+        The problem is cached until sources or consumers are added, and update_demand() and
+        update_capacity() modify its right-hand sides in place.
+
+        Args:
+            edge_costs (array_like, optional): Additional cost per unit of each flow, e.g. transmission
+                costs, with shape (n_sources, n_consumers).
+
+        Returns:
+            TransportProblem: Cost vector, sparse constraint matrices and right-hand sides.
+        """
+        if edge_costs is not None:
+            # A copy, so that the cache is not fooled by edge costs modified in place by the caller
+            edge_costs = np.array(edge_costs, dtype=float)
+        if self._problem is not None:
+            cached_edge_costs, problem = self._problem
+            if edge_costs is None and cached_edge_costs is None or \
+                    edge_costs is not None and cached_edge_costs is not None and \
+                    np.array_equal(edge_costs, cached_edge_costs):
+                return problem
+
+        capacity, cost_per_unit, demand = self.capacity.copy(), self.cost_per_unit, self.demand.copy()
+        n_sources, n_consumers = len(capacity), len(demand)
+        n_flows = n_sources * n_consumers
+
+        c = np.repeat(cost_per_unit, n_consumers)
+        if edge_costs is not None:
+            c = c + edge_costs.reshape(n_flows)
+
+        flows = np.arange(n_flows)
+        ones = np.ones(n_flows)
+        A_ub = sparse.csr_array((ones, (flows // n_consumers, flows)), shape=(n_sources, n_flows))
+        A_eq = sparse.csr_array((ones, (flows % n_consumers, flows)), shape=(n_consumers, n_flows))
+
+        problem = TransportProblem(c, A_ub, capacity, A_eq, demand, (n_sources, n_consumers))
+        self._problem = (edge_costs, problem)
+        return problem
+
+    def solve_transport(self, edge_costs=None, method=None):
+        """
+        Solve the general transport problem between all the sources and consumers.
+
+        Without edge costs, the cost of a flow only depends on its source, so the problem reduces to a
+        merit-order dispatch: sources are used by increasing cost until the total demand is met, and each
+        source supplies every consumer in proportion to its demand. Otherwise the sparse linear program of
+        transport_problem() is solved by HiGHS.
+
+        Args:
+            edge_costs (array_like, optional): Additional cost per unit of each flow, with shape
+                (n_sources, n_consumers).
+            method (str, optional): 'merit_order', or a HiGHS method of scipy.optimize.linprog such as
+                'highs', 'highs-ds' or 'highs-ipm'. Defaults to 'merit_order' without edge costs and to
+                'highs-ipm', the fastest on these degenerate problems, otherwise.
+
+        Returns:
+            dict: Optimal flows with shape (n_sources, n_consumers) under 'flows', and
+            'minimum_total_cost'.
+
+        Raises:
+            ValueError: If the problem is infeasible, or if the merit order is asked with edge costs.
+        """
+        problem = self.transport_problem(edge_costs)
+        if method is None:
+            method = 'merit_order' if edge_costs is None else 'highs-ipm'
+
+        if method == 'merit_order':
+            if edge_costs is not None:
+                raise ValueError("The merit order does not support edge costs")
+            flows = merit_order_dispatch(problem.b_ub, problem.c[::problem.shape[1]], problem.b_eq)
+            solution = {'flows': flows, 'minimum_total_cost': problem.c @ flows.ravel()}
+        else:
+            result = linprog(problem.c, A_ub=problem.A_ub, b_ub=problem.b_ub, A_eq=problem.A_eq,
+                             b_eq=problem.b_eq, bounds=(0, None), method=method)
+            if not result.success:
+                raise ValueError(f"The transport problem could not be solved: {result.message}")
+            solution = {'flows': result.x.reshape(problem.shape), 'minimum_total_cost': result.fun}
+
+        self._last_solve = {'solver': 'solve_transport', 'edge_costs': edge_costs, 'method': method,
+                            'flows': solution['flows'].copy()}
+        return solution
+
+    def dispatch_series(self, profiles, chunk_size=24 * 7, edge_costs=None, method=None):
+        """
+        Dispatch a time series of capacities and demands, one chunk of periods at a time.
+
+        Each period is an independent transport problem whose capacities and demands are read from the
+        profile columns named after the sources and consumers; sources or consumers without a column keep
+        their static value. Without edge costs every chunk is solved by a single vectorized merit-order
+        dispatch. Otherwise the constraint matrices are built once per chunk length and the periods of a
+        chunk are solved together as one block-diagonal linear program. Only one chunk is held in memory
+        at a time, whatever the length of the horizon.
+
+        Args:
+            profiles: Path of a CSV or Parquet file, a DataFrame or dictionary of arrays with one row per
+                period, or an iterable of such chunks.
+            chunk_size (int, optional): Number of periods per chunk when the profiles are read or sliced.
+            edge_costs (array_like, optional): Additional cost per unit of each flow, with shape
+                (n_sources, n_consumers).
+            method (str, optional): As in solve_transport().
+
+        Yields:
+            dict: Index of the first period of the chunk under 'start', flows with shape
+            (n_periods, n_sources, n_consumers) under 'flows' and the cost of each period under 'costs'.
+
+        Raises:
+            ValueError: If a period is infeasible.
+        """
+        problem = self.transport_problem(edge_costs)
+        n_sources, n_consumers = problem.shape
+        if method is None:
+            method = 'merit_order' if edge_costs is None else 'highs-ipm'
+        if method == 'merit_order' and edge_costs is not None:
+            raise ValueError("The merit order does not support edge costs")
+
+        blocks = {}
+        start = 0
+        for chunk in _profile_chunks(profiles, chunk_size):
+            n_periods = len(chunk) if isinstance(chunk, pd.DataFrame) else max(map(len, chunk.values()))
+            capacity = _profile_columns(chunk, self._sources.index, self.capacity, n_periods)
+            demand = _profile_columns(chunk, self._consumers.index, self.demand, n_periods)
+
+            if method == 'merit_order':
+                flows = merit_order_dispatch(capacity, self.cost_per_unit, demand)
+            else:
+                if n_periods not in blocks:
+                    eye = sparse.identity(n_periods, format='csr')
+                    blocks[n_periods] = (np.tile(problem.c, n_periods), sparse.kron(eye, problem.A_ub, format='csr'),
+                                         sparse.kron(eye, problem.A_eq, format='csr'))
+                c, A_ub, A_eq = blocks[n_periods]
+                result = linprog(c, A_ub=A_ub, b_ub=capacity.ravel(), A_eq=A_eq, b_eq=demand.ravel(),
+                                 bounds=(0, None), method=method)
+                if not result.success:
+                    raise ValueError(f"The transport problem could not be solved from period {start}: "
+                                     f"{result.message}")
+                flows = result.x.reshape(n_periods, n_sources, n_consumers)
+
+            costs = flows.reshape(n_periods, -1) @ problem.c
+            yield {'start': start, 'flows': flows, 'costs': costs}
+            start += n_periods
+
+    def objective(self, x):
+        """
+        Total cost of the flattened flows of the transport problem, see transport_problem().
+
+        Args:
+            x (numpy.ndarray): Flows with shape (n_sources * n_consumers,), source-major.
+
+        Returns:
+            float: Total cost.
+        """
+        return self.transport_problem().c @ x
+
+    def gradient(self, x):
+        """Gradient of objective(), which is constant: the cost per unit of each flow."""
+        return self.transport_problem().c
+
+    def linear_constraints(self):
+        """
+        Demand and capacity constraints of the transport problem as SciPy linear constraints.
+
+        The demand rows (demand_constraint() as a matrix) must equal the demands and the capacity rows
+        (capacity_constraint() as a matrix) must not exceed the capacities. Their Jacobians are the
+        constant sparse matrices of transport_problem().
+
+        Returns:
+            list of scipy.optimize.LinearConstraint: Demand and capacity constraints.
+        """
+        problem = self.transport_problem()
+        return [LinearConstraint(problem.A_eq, problem.b_eq, problem.b_eq),
+                LinearConstraint(problem.A_ub, -np.inf, problem.b_ub)]
+
+    def solve(self, x0=None, method='trust-constr', options=None):
+        """
+        Solve the transport problem with scipy.optimize.minimize and analytic derivatives.
+
+        The objective comes with its exact gradient and (zero) Hessian and the constraints are passed as
+        LinearConstraint objects, so that no derivative is estimated by finite differences.
+
+        Args:
+            x0 (array_like, optional): Initial flows with shape (n_sources, n_consumers). Defaults to every
+                consumer being supplied by the sources in proportion to their capacity.
+            method (str): 'trust-constr', which keeps the constraint matrices sparse, or 'SLSQP'.
+            options (dict, optional): Options of the minimizer.
+
+        Returns:
+            dict: Optimal flows with shape (n_sources, n_consumers) under 'flows', 'minimum_total_cost'
+            and the number of iterations under 'nit'.
+
+        Raises:
+            ValueError: If the minimizer fails.
+        """
+        problem = self.transport_problem()
+        if x0 is None:
+            x0 = np.outer(problem.b_ub / problem.b_ub.sum(), problem.b_eq)
+        x0 = np.asarray(x0, dtype=float).ravel()
+
+        kwargs = {}
+        if method == 'trust-constr':
+            n_flows = len(problem.c)
+            kwargs['hess'] = lambda x: sparse.csr_array((n_flows, n_flows))
+
+        result = minimize(self.objective, x0, jac=self.gradient, method=method, bounds=Bounds(0, np.inf),
+                          constraints=self.linear_constraints(), options=options or {}, **kwargs)
+        if not result.success:
+            raise ValueError(f"The minimization failed: {result.message}")
+
+        flows = np.clip(result.x, 0, None).reshape(problem.shape)
+        self._last_solve = {'solver': 'solve', 'method': method, 'options': options, 'flows': flows.copy()}
+        return {'flows': flows, 'minimum_total_cost': self.objective(flows.ravel()), 'nit': result.nit}
 
     def check_solution_integrity(self, solution, tolerance=1e-9):
         """Test that the proposed solution satisfies the problem requirements"""
@@ -132,9 +606,9 @@ class EnergyDistribution:
         solar_demand, wind_demand, A_demand, B_demand = calculate_local_demand(solution)
 
         if not math.isclose(A_demand, self.D_A):
-            raise ValueError(f"Customer A's demand is not met ({A_demand}!={self.consumers['A']['demand']})")
+            raise ValueError(f"Customer A's demand is not met ({A_demand}!={self.D_A})")
         if not math.isclose(B_demand, self.D_B):
-            raise ValueError(f"customer B's demand is not met ({B_demand}!={self.consumers['B']['demand']})")
+            raise ValueError(f"customer B's demand is not met ({B_demand}!={self.D_B})")
         if solar_demand - self.S_max > tolerance:
             raise ValueError(f"Total Solar demand exceeds Solar capacity ({solar_demand}>{self.S_max}")
         if wind_demand - self.W_max > tolerance:
@@ -142,6 +616,9 @@ class EnergyDistribution:
 
         return True
 
+    def _source_cost(self, name):
+        return self.cost_per_unit[self._sources.index[name]]
+
     def cost_function(self, solution, test=False):
 
         # Test input correctness
@@ -150,58 +627,246 @@ class EnergyDistribution:
 
         solar_demand, wind_demand, A_demand, B_demand = calculate_local_demand(solution)
 
-        return self.sources['Solar']['cost_per_unit'] * solar_demand + \
-            self.sources['Wind']['cost_per_unit'] * wind_demand
+        return self._source_cost('Solar') * solar_demand + self._source_cost('Wind') * wind_demand
 
     def generate_one_solution(self):
 
-        a = np.random.uniform(0, self.D_A)
-        b = self.D_A - a
+        while True:
+            a = np.random.uniform(0, self.D_A)
+            b = self.D_A - a
 
-        # Possible range for c based on a + c < S_max
-        max_c = self.S_max - a
+            # Possible range for c based on a + c < S_max
+            max_c = self.S_max - a
 
-        # Random float for c such that a + c < S_max and c < max_c
-        c = np.random.uniform(0, min(max_c, self.S_max))
-        d = self.D_B - c
+            # Random float for c such that a + c < S_max and c < max_c
+            c = np.random.uniform(0, min(max_c, self.S_max))
+            d = self.D_B - c
 
-        solution = np.array([[a, b], [c, d]])
+            solution = np.array([[a, b], [c, d]])
 
-        # if any value is negative repeat
-        if (solution < 0).any():
-            return self.generate_one_solution()
+            # if any value is negative repeat
+            if (solution < 0).any():
+                continue
 
-        # Check integrity of solution, else repeat
-        try:
-            self.check_solution_integrity(solution)
-        except ValueError:
-            return self.generate_one_solution()
+            # Check integrity of solution, else repeat
+            try:
+                self.check_solution_integrity(solution)
+            except ValueError:
+                continue
 
-        # Check column 1 constraint (b + d < W_max)
-        if b + d > self.W_max:
-            return self.generate_one_solution()
+            # Check column 1 constraint (b + d < W_max)
+            if b + d > self.W_max:
+                continue
 
-        return solution
+            return solution
 
-    def generate_many_solutions(self, nsolutions=1000):
+    def feasible_polygon(self):
+        """
+        Compute the feasible region of the flows from Solar to consumers A and B.
 
-        solutions = []
-        costs = []
-        solution_hashes = set()  # To store hashes of arrays for quick membership checks
+        Once the solar flows ``a = solution[0, 0]`` and ``c = solution[1, 0]`` are chosen, the wind flows
+        follow from the demands. The feasible (a, c) are the box [0, D_A] x [0, D_B] cut by the solar
+        capacity ``a + c <= S_max`` and the wind capacity ``a + c >= D_A + D_B - W_max``.
 
-        for _ in range(nsolutions):
-            solution = self.generate_one_solution()
-            solution_tuple = tuple(map(tuple, solution))  # Convert array to a tuple of tuples
+        Returns:
+            numpy.ndarray: Vertices of the convex feasible polygon in counter-clockwise order, with shape
+            (n_vertices, 2). Empty if the problem is infeasible.
+        """
+        polygon = np.array([[0., 0.], [self.D_A, 0.], [self.D_A, self.D_B], [0., self.D_B]])
+        polygon = _clip_polygon(polygon, np.array([1., 1.]), self.S_max)
+        polygon = _clip_polygon(polygon, np.array([-1., -1.]), self.W_max - self.D_A - self.D_B)
+        return polygon
 
-            if solution_tuple not in solution_hashes:
-                cost = self.cost_function(solution)
-                costs.append(cost)
-                solutions.append(solution)
-                solution_hashes.add(solution_tuple)  # Store the hashable version
-            else:
-                print('Solution already present')
+    def sample_solutions(self, n_solutions, seed=None, method='polytope', batch_size=10 ** 6):
+        """
+        Draw many feasible solutions at once.
+
+        With method='polytope' the feasible polygon of the solar flows is triangulated and points are drawn
+        uniformly inside it, so that every draw is accepted. With method='rejection' candidates are drawn
+        uniformly in the box of the solar flows, in batches of batch_size, and filtered with vectorized
+        masks on the solar and wind capacities.
+
+        Args:
+            n_solutions (int): Number of solutions to draw.
+            seed (int or numpy.random.Generator, optional): Seed of the random number generator.
+            method (str): Either 'polytope' or 'rejection'.
+            batch_size (int): Number of candidates drawn at once by the rejection method.
+
+        Returns:
+            numpy.ndarray: Solutions with shape (n_solutions, 2, 2), laid out as in generate_one_solution().
+
+        Raises:
+            ValueError: If the problem is infeasible or the method is unknown.
+        """
+        rng = np.random.default_rng(seed)
+
+        if method == 'polytope':
+            solar = _sample_polygon(self.feasible_polygon(), n_solutions, rng)
+        elif method == 'rejection':
+            solar = self._sample_rejection(n_solutions, rng, batch_size)
+        else:
+            raise ValueError(f"Unknown sampling method {method}")
+
+        solutions = np.empty((n_solutions, 2, 2))
+        solutions[:, :, 0] = solar
+        solutions[:, 0, 1] = self.D_A - solar[:, 0]
+        solutions[:, 1, 1] = self.D_B - solar[:, 1]
+        return solutions
+
+    def _sample_rejection(self, n_solutions, rng, batch_size, max_batches=1000):
+        accepted = []
+        n_accepted = 0
+        for _ in range(max_batches):
+            if n_accepted >= n_solutions:
+                break
+            solar = rng.uniform((0., 0.), (self.D_A, self.D_B), size=(batch_size, 2))
+            total = solar.sum(axis=1)
+            mask = (total <= self.S_max) & (self.D_A + self.D_B - total <= self.W_max)
+            accepted.append(solar[mask])
+            n_accepted += mask.sum()
+        else:
+            if n_accepted < n_solutions:
+                raise ValueError(f"Only {n_accepted} feasible solutions found in {max_batches} batches")
+
+        return np.concatenate(accepted)[:n_solutions]
+
+    def batch_cost(self, solutions):
+        """
+        Compute the cost of many solutions with a single matrix product.
+
+        Args:
+            solutions (numpy.ndarray): Solutions with shape (n, 2, 2), laid out as in generate_one_solution().
+
+        Returns:
+            numpy.ndarray: Costs with shape (n,).
+        """
+        cost_per_unit = np.array([self._source_cost('Solar'), self._source_cost('Wind')])
+        return solutions.reshape(len(solutions), -1) @ np.tile(cost_per_unit, 2)
+
+    def generate_many_solutions(self, nsolutions=1000, seed=None, decimals=None, batch_size=10 ** 6,
+                                method='polytope'):
+        """
+        Generate many distinct feasible solutions and their costs.
+
+        Solutions are drawn in batches with sample_solutions() into a single contiguous array, scored with
+        batch_cost() and deduplicated with np.unique on their rows.
+
+        Args:
+            nsolutions (int): Number of solutions to draw.
+            seed (int or numpy.random.Generator, optional): Seed of the random number generator.
+            decimals (int, optional): If given, solutions equal once rounded to this many decimals are
+                considered duplicates, and the rounded solutions are returned.
+            batch_size (int): Number of solutions drawn at once, which bounds the temporary memory.
+            method (str): Sampling method, see sample_solutions().
+
+        Returns:
+            tuple: Distinct solutions with shape (n, 2, 2), in the order they were drawn, and their costs
+            with shape (n,), where n <= nsolutions.
+        """
+        rng = np.random.default_rng(seed)
+
+        solutions = np.empty((nsolutions, 2, 2))
+        for start in range(0, nsolutions, batch_size):
+            stop = min(start + batch_size, nsolutions)
+            solutions[start:stop] = self.sample_solutions(stop - start, seed=rng, method=method,
+                                                          batch_size=batch_size)
+
+        if decimals is not None:
+            np.round(solutions, decimals, out=solutions)
+
+        # Compare rows as raw bytes, which is much faster than np.unique(..., axis=0) on floats
+        rows = np.ascontiguousarray(solutions.reshape(nsolutions, -1))
+        rows = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+        _, first = np.unique(rows, return_index=True)
+        if len(first) < nsolutions:
+            solutions = solutions[np.sort(first)]
+
+        return solutions, self.batch_cost(solutions)
+
+
+def merit_order_dispatch(capacity, cost_per_unit, demand):
+    """
+    Dispatch sources by increasing cost per unit until the total demand is met.
+
+    All arguments may have leading dimensions, e.g. one row per period, which are solved independently in
+    a single vectorized pass.
+
+    Args:
+        capacity (array_like): Capacity of each source, with shape (..., n_sources).
+        cost_per_unit (array_like): Cost per unit of each source, with shape (..., n_sources).
+        demand (array_like): Demand of each consumer, with shape (..., n_consumers).
+
+    Returns:
+        numpy.ndarray: Optimal flows with shape (..., n_sources, n_consumers); each source supplies the
+        consumers in proportion to their demand.
+
+    Raises:
+        ValueError: If the total demand exceeds the total capacity.
+    """
+    capacity, cost_per_unit = np.broadcast_arrays(np.asarray(capacity, dtype=float),
+                                                  np.asarray(cost_per_unit, dtype=float))
+    demand = np.asarray(demand, dtype=float)
+    total_demand = demand.sum(axis=-1)
+
+    if (total_demand > capacity.sum(axis=-1) * (1 + 1e-12)).any():
+        raise ValueError("The total demand exceeds the total capacity of the sources")
+
+    order = np.argsort(cost_per_unit, axis=-1, kind='stable')
+    sorted_capacity = np.take_along_axis(capacity, order, axis=-1)
+    used_before = np.cumsum(sorted_capacity, axis=-1) - sorted_capacity
+    sorted_output = np.clip(total_demand[..., None] - used_before, 0, sorted_capacity)
 
-        return solutions, costs
+    output = np.empty_like(sorted_output)
+    np.put_along_axis(output, order, sorted_output, axis=-1)
+
+    share = np.divide(demand, total_demand[..., None], out=np.zeros_like(demand),
+                      where=total_demand[..., None] > 0)
+    return output[..., :, None] * share[..., None, :]
+
+
+def read_profiles(path, chunk_size=24 * 7):
+    """
+    Read a CSV or Parquet profile file chunk by chunk.
+
+    Args:
+        path (str or os.PathLike): Path of the file; files ending in '.parquet' are read with pyarrow.
+        chunk_size (int, optional): Number of rows per chunk.
+
+    Yields:
+        pandas.DataFrame: Consecutive chunks of at most chunk_size rows.
+    """
+    path = os.fspath(path)
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def _profile_chunks(profiles, chunk_size):
+    if isinstance(profiles, (str, os.PathLike)):
+        yield from read_profiles(profiles, chunk_size)
+    elif isinstance(profiles, pd.DataFrame):
+        for start in range(0, len(profiles), chunk_size):
+            yield profiles.iloc[start:start + chunk_size]
+    elif isinstance(profiles, dict):
+        columns = {name: np.asarray(values) for name, values in profiles.items()}
+        n_periods = max(len(values) for values in columns.values())
+        for start in range(0, n_periods, chunk_size):
+            yield {name: values[start:start + chunk_size] for name, values in columns.items()}
+    else:
+        yield from profiles
+
+
+def _profile_columns(chunk, index, static, n_periods):
+    values = np.empty((n_periods, len(static)))
+    values[:] = static
+    for name, i in index.items():
+        if name in chunk:
+            values[:, i] = chunk[name]
+    return values
 
 
 def calculate_local_demand(solution):
@@ -223,3 +888,51 @@ def calculate_local_demand(solution):
         raise ValueError(f"Incorrect input shape = {solution.shape}")
 
     return solar_demand, wind_demand, A_demand, B_demand
+
+
+def _clip_polygon(vertices, normal, offset):
+    """Clip a convex polygon to the half-plane ``normal @ v <= offset`` (Sutherland-Hodgman)."""
+    clipped = []
+    n_vertices = len(vertices)
+    for i in range(n_vertices):
+        current, following = vertices[i], vertices[(i + 1) % n_vertices]
+        current_inside = normal @ current <= offset
+        following_inside = normal @ following <= offset
+        if current_inside:
+            clipped.append(current)
+        if current_inside != following_inside:
+            t = (offset - normal @ current) / (normal @ (following - current))
+            clipped.append(current + t * (following - current))
+    return np.array(clipped).reshape(-1, 2)
+
+
+def _sample_polygon(vertices, n_points, rng):
+    """
+    Draw points uniformly inside a convex polygon.
+
+    The polygon is split in a fan of triangles, a triangle is chosen for each point with probability
+    proportional to its area, and the point is drawn uniformly inside it. A polygon with no area is
+    sampled uniformly along its longest diagonal.
+    """
+    if len(vertices) == 0:
+        raise ValueError("The problem has no feasible solution")
+
+    origin = vertices[0]
+    edges_1 = vertices[1:-1] - origin
+    edges_2 = vertices[2:] - origin
+    areas = 0.5 * np.abs(edges_1[:, 0] * edges_2[:, 1] - edges_1[:, 1] * edges_2[:, 0])
+    total_area = areas.sum()
+
+    if total_area <= 1e-12 * max(np.ptp(vertices, axis=0).max(), 1.) ** 2:
+        distances = np.linalg.norm(vertices[:, None] - vertices[None, :], axis=-1)
+        i, j = np.unravel_index(distances.argmax(), distances.shape)
+        t = rng.uniform(size=(n_points, 1))
+        return vertices[i] + t * (vertices[j] - vertices[i])
+
+    triangle = rng.choice(len(areas), size=n_points, p=areas / total_area)
+    u, v = rng.uniform(size=(2, n_points, 1))
+
+    # Points with u + v > 1 are reflected back into the triangle
+    outside = (u + v > 1)
+    u, v = np.where(outside, 1 - u, u), np.where(outside, 1 - v, v)
+    return origin + u * edges_1[triangle] + v * edges_2[triangle]
@@ -1,33 +1,70 @@
+import contextlib
+import contextvars
+import functools
+import logging
 import time
-import tracemalloc
+
+from optimization.core.profiling import MEMORY_TRACER
+
+# Global instrumentation switch, see set_instrumentation(), and its scoped override, see instrumentation()
+_instrumentation_enabled = True
+_instrumentation_override = contextvars.ContextVar('instrumentation_override', default=None)
+
+
+def set_instrumentation(enabled):
+    """
+    Turn the instrumentation of the solver methods on or off for the whole process.
+
+    Args:
+        enabled (bool): If False, instrumented functions run through their uninstrumented fast path.
+    """
+    global _instrumentation_enabled
+    _instrumentation_enabled = bool(enabled)
+
+
+@contextlib.contextmanager
+def instrumentation(enabled):
+    """
+    Context manager turning the instrumentation on or off within a block, in the current thread only.
+
+    Example:
+        >>> with instrumentation(False):
+        ...     result = allocator.dynamic_programming()  # no timing, memory tracing or logging
+    """
+    token = _instrumentation_override.set(bool(enabled))
+    try:
+        yield
+    finally:
+        _instrumentation_override.reset(token)
+
+
+def instrumentation_enabled():
+    """Return True if the instrumentation is currently on."""
+    override = _instrumentation_override.get()
+    return _instrumentation_enabled if override is None else override
 
 
 def time_measure(func):
     """
     Decorator that measures the execution time of a function.
 
+    The time is measured with the monotonic ``time.perf_counter_ns`` clock.
+
     Args:
         func (function): The function to be wrapped by the decorator.
 
     Returns:
-        function: A wrapped function that, when called, adds the execution time to
-        its returned dictionary.
+        function: A wrapped function that, when called, returns a copy of its result dictionary with the
+        execution time in milliseconds added under 'elapsed_time'.
     """
 
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Start timing
-        start_time = time.time()
-
-        # Execute the function
+        start_time = time.perf_counter_ns()
         result = func(*args, **kwargs)
+        elapsed_time = (time.perf_counter_ns() - start_time) / 1e6
 
-        # Stop timing and calculate elapsed time
-        end_time = time.time()
-        elapsed_time = 1e3 * (end_time - start_time)
-
-        # Add execution time to the result dictionary
-        result['elapsed_time'] = elapsed_time
-        return result
+        return {**result, 'elapsed_time': elapsed_time}
 
     return wrapper
 
@@ -37,31 +74,27 @@ def performance_measure(func):
     Decorator that measures memory usage of the function execution and adds it
     to the returned dictionary.
 
+    Memory is traced with tracemalloc through a shared tracer, so decorated functions can be nested and
+    called from several threads; the numbers then include allocations made by the other threads.
+
     Args:
         func (function): The function to be wrapped by the decorator.
 
     Returns:
-        function: A wrapped function that, when called, adds the memory usage
-        statistics (current and peak) to its result dictionary.
+        function: A wrapped function that, when called, returns a copy of its result dictionary with the
+        memory allocated during the call and still alive ('current') and the peak memory allocated during
+        the call ('peak'), in bytes.
     """
 
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Start memory tracking
-        tracemalloc.start()
+        frame = MEMORY_TRACER.enter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            current, peak = MEMORY_TRACER.exit(frame)
 
-        # Execute the function
-        result = func(*args, **kwargs)
-
-        # Get memory usage statistics
-        current, peak = tracemalloc.get_traced_memory()
-
-        # Stop memory tracking
-        tracemalloc.stop()
-
-        # Add memory usage to the result dictionary
-        result['current'] = current
-        result['peak'] = peak
-        return result
+        return {**result, 'current': current, 'peak': peak}
 
     return wrapper
 
@@ -78,6 +111,7 @@ def print_output(func):
         from its returned dictionary and then returns the dictionary unchanged.
     """
 
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
         # Execute the function and capture the result
         result = func(*args, **kwargs)
@@ -89,3 +123,58 @@ def print_output(func):
         return result
 
     return wrapper
+
+
+def log_output(func):
+    """
+    Decorator that logs the result of a function as a structured record.
+
+    The record is emitted at INFO level on the logger of the module defining the function, with the
+    result dictionary attached as the ``result`` attribute of the log record.
+
+    Args:
+        func (function): The function to be wrapped by the decorator.
+
+    Returns:
+        function: A wrapped function that, when called, logs its returned dictionary and then returns it
+        unchanged.
+    """
+    logger = logging.getLogger(func.__module__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('%s: %s', func.__qualname__, result,
+                        extra={'function': func.__qualname__, 'result': result})
+        return result
+
+    return wrapper
+
+
+def instrumented(func):
+    """
+    Decorator that measures time and memory of a solver and logs its result, unless turned off.
+
+    The instrumentation can be turned off for the whole process with set_instrumentation(False), within a
+    block with ``instrumentation(False)``, or for a single call with the ``instrument=False`` keyword
+    argument. The function is then called directly, with no timing, memory tracing or logging.
+
+    Args:
+        func (function): The function to be wrapped by the decorator.
+
+    Returns:
+        function: A wrapped function that, when instrumented, returns a copy of its result dictionary with
+        'elapsed_time', 'current' and 'peak' added, as with time_measure and performance_measure.
+    """
+    measured = time_measure(performance_measure(log_output(func)))
+
+    @functools.wraps(func)
+    def wrapper(*args, instrument=None, **kwargs):
+        if instrument is None:
+            instrument = instrumentation_enabled()
+        if instrument:
+            return measured(*args, **kwargs)
+        return func(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,114 @@
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import sympy as sp
+from scipy.optimize import minimize
+
+from optimization.equations.equations import C_s, C_total, C_w, DA, DB, S_max, W_max, constraint_types, \
+    constraints, xs, xw, ys, yw
+
+VARIABLES = (xs, xw, ys, yw)
+PARAMETERS = (DA, DB, S_max, W_max, C_s, C_w)
+
+CompiledExpression = namedtuple('CompiledExpression', ['function', 'gradient'])
+CompiledExpression.__doc__ = """
+NumPy functions ``function(x, p)`` and ``gradient(x, p)`` of a sympy expression, where x holds the values of
+the variables and p those of the parameters, in order.
+"""
+
+
+@lru_cache(maxsize=None)
+def compile_expression(expression, variables=VARIABLES, parameters=PARAMETERS):
+    """
+    Compile a sympy expression and its gradient into NumPy functions.
+
+    The compilation with sympy.lambdify is cached by expression, variables and parameters, so that a model
+    is only compiled once per process.
+
+    Args:
+        expression (sympy.Expr): Expression of the variables and parameters.
+        variables (tuple of sympy.Symbol, optional): Variables, in the order of x.
+        parameters (tuple of sympy.Symbol, optional): Parameters, in the order of p.
+
+    Returns:
+        CompiledExpression: Value and gradient functions.
+    """
+    arguments = [list(variables), list(parameters)]
+    function = sp.lambdify(arguments, expression, 'numpy')
+    derivatives = sp.lambdify(arguments, [sp.diff(expression, variable) for variable in variables], 'numpy')
+
+    def gradient(x, p):
+        return np.array(derivatives(x, p), dtype=float)
+
+    return CompiledExpression(function, gradient)
+
+
+def compile_constraints(expressions=tuple(constraints), types=constraint_types, variables=VARIABLES,
+                        parameters=PARAMETERS):
+    """
+    Compile constraints into the format of scipy.optimize.minimize.
+
+    Equality constraints are written ``expression == 0`` and inequality constraints ``expression <= 0``;
+    the latter are negated, since SciPy requires non-negative inequality constraints.
+
+    Args:
+        expressions (sequence of sympy.Expr): Constraint expressions.
+        types (sequence of str): 'eq' or 'ineq', for each constraint.
+        variables (tuple of sympy.Symbol, optional): Variables, in the order of x.
+        parameters (tuple of sympy.Symbol, optional): Parameters, in the order of p.
+
+    Returns:
+        list of dict: Constraints with their 'type', 'fun' and 'jac', taking the parameters as extra argument.
+
+    Raises:
+        ValueError: If a constraint type is unknown.
+    """
+    compiled = []
+    for expression, constraint_type in zip(expressions, types):
+        if constraint_type not in ('eq', 'ineq'):
+            raise ValueError(f"Unknown constraint type {constraint_type}")
+        sign = 1 if constraint_type == 'eq' else -1
+        function, gradient = compile_expression(sign * expression, variables, parameters)
+        compiled.append({'type': constraint_type, 'fun': function, 'jac': gradient})
+    return compiled
+
+
+def solve(DA, DB, S_max, W_max, C_s, C_w, x0=None, method='SLSQP'):
+    """
+    Solve the renewable energy model of equations.py for numeric parameters.
+
+    The objective, the constraints and their gradients are compiled NumPy functions, so that each
+    evaluation by the minimizer costs microseconds instead of a sympy substitution.
+
+    Args:
+        DA (float): Demand of consumer A.
+        DB (float): Demand of consumer B.
+        S_max (float): Capacity of the solar source.
+        W_max (float): Capacity of the wind source.
+        C_s (float): Cost per unit of solar energy.
+        C_w (float): Cost per unit of wind energy.
+        x0 (array_like, optional): Initial values of (xs, xw, ys, yw). Defaults to the demands being split
+            evenly between the sources.
+        method (str, optional): Method of scipy.optimize.minimize supporting constraints.
+
+    Returns:
+        dict: Optimal values of 'xs', 'xw', 'ys' and 'yw', and 'minimum_total_cost'.
+
+    Raises:
+        ValueError: If the minimization fails.
+    """
+    p = np.array([DA, DB, S_max, W_max, C_s, C_w], dtype=float)
+    if x0 is None:
+        x0 = [0.5 * DA, 0.5 * DA, 0.5 * DB, 0.5 * DB]
+
+    objective = compile_expression(C_total)
+    problem_constraints = [dict(constraint, args=(p,)) for constraint in compile_constraints()]
+    result = minimize(objective.function, x0, args=(p,), jac=objective.gradient, method=method,
+                      bounds=[(0, None)] * len(VARIABLES), constraints=problem_constraints)
+    if not result.success:
+        raise ValueError(f"The minimization failed: {result.message}")
+
+    solution = {str(variable): value for variable, value in zip(VARIABLES, result.x.tolist())}
+    solution['minimum_total_cost'] = float(result.fun)
+    return solution
@@ -1,5 +1,4 @@
 import sympy as sp
-from scipy.optimize import minimize
 
 # Define variables
 xs, xw, ys, yw = sp.symbols('xs xw ys yw', real=True, nonnegative=True)
@@ -8,47 +7,22 @@ DA, DB, S_max, W_max, C_s, C_w = sp.symbols('DA DB S_max W_max C_s C_w', real=Tr
 # Define objective function
 C_total = C_s * (xs + ys) + C_w * (xw + yw)
 
-# Define constraints
+# Define constraints: the demands must be met (== 0) and the capacities not exceeded (<= 0)
 constraints = [
     xs + xw - DA,
     ys + yw - DB,
     xs + ys - S_max,
     xw + yw - W_max
 ]
+constraint_types = ('eq', 'eq', 'ineq', 'ineq')
 
-# Define objective function for SciPy
-def objective(values):
-    xs_val, xw_val, ys_val, yw_val = values
-    return C_total.subs({xs: xs_val, xw: xw_val, ys: ys_val, yw: yw_val})
+if __name__ == '__main__':
+    from optimization.equations.compiled import solve
 
-# Define constraint functions for SciPy
-def constraint_eq0(values):
-    return values[0] + values[1] - DA
-def constraint_eq1(values):
-    return values[2] + values[3] - DB
-def constraint_eq2(values):
-    return values[0] + values[2] - S_max
-def constraint_eq3(values):
-    return values[1] + values[3] - W_max
+    # Solve the optimization problem with compiled NumPy functions
+    result = solve(DA=3., DB=5., S_max=100., W_max=150., C_s=0.10, C_w=0.05)
 
-# Set initial guess
-initial_guess = [0.5 * DA, 0.5 * W_max, 0.5 * DB, 0.5 * W_max]
-
-# Define bounds (non-negative)
-bounds = [(0, None)] * 4
-
-# Define equality constraints
-constraints_eq = (
-    {'type': 'eq', 'fun': constraint_eq0},
-    {'type': 'eq', 'fun': constraint_eq1},
-    {'type': 'eq', 'fun': constraint_eq2},
-    {'type': 'eq', 'fun': constraint_eq3}
-)
-
-# Solve the optimization problem using SciPy
-result = minimize(objective, initial_guess, bounds=bounds, constraints=constraints_eq)
-
-# Print the optimal values
-print("Optimal values:")
-for var, val in zip([xs, xw, ys, yw], result.x):
-    print(f"{var}: {val}")
+    # Print the optimal values
+    print("Optimal values:")
+    for var in (xs, xw, ys, yw):
+        print(f"{var}: {result[str(var)]}")
@@ -0,0 +1,165 @@
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import sympy as sp
+from scipy import sparse
+from scipy.optimize import linprog
+
+from optimization.equations.compiled import PARAMETERS, VARIABLES
+from optimization.equations.equations import C_total, constraint_types, constraints
+
+LinearProgram = namedtuple('LinearProgram', ['c', 'A_ub', 'b_ub', 'A_eq', 'b_eq', 'constant'])
+LinearProgram.__doc__ = """
+Numeric linear program: minimize ``c @ x + constant`` subject to ``A_ub @ x <= b_ub`` and ``A_eq @ x == b_eq``,
+with sparse constraint matrices.
+"""
+
+
+class SymbolicLinearProgram:
+    """
+    Linear program written with sympy, compiled to sparse matrices.
+
+    The coefficients of the variables are extracted once from the expanded expressions; they may depend
+    on parameters, and are then evaluated for given parameter values by a single lambdified function, so
+    that only numbers are computed for each instance.
+    """
+
+    def __init__(self, objective, constraints, types, variables, parameters=()):
+        """
+        Initialize a SymbolicLinearProgram object.
+
+        Args:
+            objective (sympy.Expr): Objective to minimize.
+            constraints (sequence of sympy.Expr): Constraints, written ``expression == 0`` or
+                ``expression <= 0``.
+            types (sequence of str): 'eq' or 'ineq', for each constraint.
+            variables (sequence of sympy.Symbol): Variables, in the order of the solution.
+            parameters (sequence of sympy.Symbol, optional): Parameters, in the order of their values.
+
+        Raises:
+            ValueError: If an expression is not linear in the variables, or a constraint type is unknown.
+        """
+        self.variables = tuple(variables)
+        self.parameters = tuple(parameters)
+        self._index = {variable: i for i, variable in enumerate(self.variables)}
+
+        # Coefficient expressions, evaluated all at once, and where they go
+        values = []
+        objective_terms, objective_constant = self._coefficients(objective)
+        self._c = (np.array([self._index[variable] for variable in objective_terms], dtype=np.int64),
+                   slice(len(values), len(values) + len(objective_terms)))
+        values += objective_terms.values()
+        self._constant = len(values)
+        values.append(objective_constant)
+
+        for constraint_type in types:
+            if constraint_type not in ('eq', 'ineq'):
+                raise ValueError(f"Unknown constraint type {constraint_type}")
+
+        self._rows = {}
+        for constraint_type in ('eq', 'ineq'):
+            expressions = [expression for expression, expression_type in zip(constraints, types)
+                           if expression_type == constraint_type]
+            rows, columns, rhs = [], [], []
+            start = len(values)
+            for row, expression in enumerate(expressions):
+                terms, constant = self._coefficients(expression)
+                rows += [row] * len(terms)
+                columns += [self._index[variable] for variable in terms]
+                values += terms.values()
+                rhs.append(-constant)
+            values += rhs
+            entries = slice(start, start + len(rows))
+            self._rows[constraint_type] = (np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64),
+                                           entries, slice(entries.stop, entries.stop + len(rhs)), len(rhs))
+
+        self._evaluate = sp.lambdify([list(self.parameters)], values, 'numpy')
+
+    def _coefficients(self, expression):
+        # Split every term of the expanded expression into a variable and a coefficient free of variables,
+        # by hash lookups rather than sympy's as_coefficients_dict(), which scans all variables per term
+        terms, constant = {}, sp.S.Zero
+        for term in sp.Add.make_args(sp.expand(expression)):
+            factors = sp.Mul.make_args(term)
+            variables = [factor for factor in factors if factor in self._index]
+            if len(variables) > 1:
+                raise ValueError(f"{expression} is not linear in the variables")
+            coefficient = sp.Mul(*[factor for factor in factors if factor not in self._index])
+            if any(symbol in self._index for symbol in coefficient.free_symbols):
+                raise ValueError(f"{expression} is not linear in the variables")
+            if variables:
+                terms[variables[0]] = terms.get(variables[0], sp.S.Zero) + coefficient
+            else:
+                constant += coefficient
+        return terms, constant
+
+    def matrices(self, parameters=()):
+        """
+        Evaluate the linear program for parameter values.
+
+        Args:
+            parameters (array_like, optional): Values of the parameters, in order.
+
+        Returns:
+            LinearProgram: Cost vector, sparse constraint matrices and right-hand sides.
+        """
+        values = np.asarray(self._evaluate(list(np.broadcast_to(parameters, len(self.parameters)))), dtype=float)
+        n_variables = len(self.variables)
+
+        c = np.zeros(n_variables)
+        columns, entries = self._c
+        np.add.at(c, columns, values[entries])
+
+        matrices = {}
+        for constraint_type, (rows, columns, entries, rhs, n_rows) in self._rows.items():
+            matrices[constraint_type] = (sparse.csr_array((values[entries], (rows, columns)),
+                                                          shape=(n_rows, n_variables)), values[rhs])
+
+        return LinearProgram(c, *matrices['ineq'], *matrices['eq'], values[self._constant])
+
+    def solve(self, parameters=(), bounds=(0, None), method='highs'):
+        """
+        Solve the linear program for parameter values with scipy.optimize.linprog.
+
+        Args:
+            parameters (array_like, optional): Values of the parameters, in order.
+            bounds (optional): Bounds of the variables, as accepted by linprog. Defaults to non-negative.
+            method (str, optional): HiGHS method of linprog.
+
+        Returns:
+            dict: Optimal values of the variables under 'x', in order, and 'minimum_total_cost'.
+
+        Raises:
+            ValueError: If the linear program cannot be solved.
+        """
+        problem = self.matrices(parameters)
+        has_ub, has_eq = problem.A_ub.shape[0] > 0, problem.A_eq.shape[0] > 0
+        result = linprog(problem.c, A_ub=problem.A_ub if has_ub else None, b_ub=problem.b_ub if has_ub else None,
+                         A_eq=problem.A_eq if has_eq else None, b_eq=problem.b_eq if has_eq else None,
+                         bounds=bounds, method=method)
+        if not result.success:
+            raise ValueError(f"The linear program could not be solved: {result.message}")
+
+        return {'x': result.x, 'minimum_total_cost': result.fun + problem.constant}
+
+
+@lru_cache(maxsize=None)
+def compile_linear_program(objective=C_total, constraints=tuple(constraints), types=constraint_types,
+                           variables=VARIABLES, parameters=PARAMETERS):
+    """
+    Compile a sympy linear program, caching the extraction of its coefficients.
+
+    Defaults to the renewable energy model of equations.py.
+
+    Args:
+        objective (sympy.Expr): Objective to minimize.
+        constraints (tuple of sympy.Expr): Constraints, written ``expression == 0`` or ``expression <= 0``.
+        types (tuple of str): 'eq' or 'ineq', for each constraint.
+        variables (tuple of sympy.Symbol): Variables, in the order of the solution.
+        parameters (tuple of sympy.Symbol): Parameters, in the order of their values.
+
+    Returns:
+        SymbolicLinearProgram: The compiled linear program.
+    """
+    return SymbolicLinearProgram(objective, constraints, types, variables, parameters)
@@ -0,0 +1,31 @@
+import json
+
+from optimization.benchmarks.__main__ import main
+from optimization.benchmarks.harness import compare, measure
+
+
+def test_measure():
+    result = measure(lambda: bytearray(10 ** 6), repeat=2, min_time=0.001)
+    assert result['time_ms'] > 0
+    assert result['peak_memory'] >= 10 ** 6
+
+
+def test_compare():
+    baseline = {'a[1]': {'time_ms': 1., 'peak_memory': 100},
+                'b[1]': {'time_ms': 1., 'peak_memory': 100}}
+    results = {'a[1]': {'time_ms': 1.1, 'peak_memory': 200},
+               'b[1]': {'time_ms': 2., 'peak_memory': 100},
+               'c[1]': {'time_ms': 5., 'peak_memory': 500}}
+
+    regressions = compare(results, baseline, time_threshold=0.25, memory_threshold=0.25)
+    assert {(r['benchmark'], r['metric']) for r in regressions} == {('a[1]', 'peak_memory'), ('b[1]', 'time_ms')}
+
+
+def test_baseline_roundtrip(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    argv = ['-k', 'bus_allocation.educated_guess', '--max-size', '100', '--repeat', '1']
+
+    assert main(argv + ['--save', str(baseline)]) == 0
+    assert list(json.loads(baseline.read_text())['results']) == ['bus_allocation.educated_guess[100]']
+
+    assert main(argv + ['--compare', str(baseline), '--time-threshold', '1000', '--memory-threshold', '1000']) == 0
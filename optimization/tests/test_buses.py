@@ -1,6 +1,7 @@
 # test_bus_allocation.py
 import pytest
-from optimization.core.bus_allocation import BusAllocation
+import numpy as np
+from optimization.core.bus_allocation import BusAllocation, FleetAllocation
 
 
 @pytest.fixture
@@ -43,3 +44,126 @@ def test_iterative_solution(bus_allocation):
         'A', 'B', 'C', 'minimum_total_cost',
         'current', 'peak', 'elapsed_time'
     }
+
+
+def test_dynamic_programming(bus_allocation):
+    result = bus_allocation.dynamic_programming()
+    assert isinstance(result, dict), "Result should be a dictionary."
+    assert set(result.keys()) == {
+        'A', 'B', 'C', 'minimum_total_cost',
+        'current', 'peak', 'elapsed_time'
+    }
+
+
+@pytest.mark.parametrize("n_students", [0, 1, 34, 100, 321, 1000, 2500])
+def test_dynamic_programming_matches_linear_programming(n_students):
+    allocator = BusAllocation(seat_config=(35, 49, 57), cost_config=(300, 400, 450), n_students=n_students)
+    exact = allocator.linear_programming()
+    result = allocator.dynamic_programming()
+
+    assert result['minimum_total_cost'] == pytest.approx(exact['minimum_total_cost'])
+    assert 35 * result['A'] + 49 * result['B'] + 57 * result['C'] >= n_students
+
+
+def test_dynamic_programming_small_and_dominant_buses():
+    """A dominant bus much larger than the others must not make the table slow to fill."""
+    allocator = BusAllocation(seat_config=(1, 2, 1000), cost_config=(11, 21, 9000), n_students=100_000)
+    exact = allocator.linear_programming()
+    result = allocator.dynamic_programming()
+
+    assert result['minimum_total_cost'] == pytest.approx(exact['minimum_total_cost'])
+    assert result['A'] + 2 * result['B'] + 1000 * result['C'] >= 100_000
+
+
+@pytest.fixture
+def fleet_allocation():
+    """Fixture to create a FleetAllocation instance with six bus types."""
+    return FleetAllocation(seat_config=(9, 16, 30, 35, 49, 57),
+                           cost_config=(110, 180, 290, 300, 400, 450),
+                           n_students=321)
+
+
+def test_fleet_names(fleet_allocation):
+    result = fleet_allocation.dynamic_programming()
+    assert set(result.keys()) == {
+        'A', 'B', 'C', 'D', 'E', 'F', 'minimum_total_cost',
+        'current', 'peak', 'elapsed_time'
+    }
+
+
+@pytest.mark.parametrize("n_students", [0, 1, 50, 321, 1000])
+def test_fleet_solvers_agree(n_students):
+    fleet = FleetAllocation(seat_config=(9, 16, 30, 35, 49, 57),
+                            cost_config=(110, 180, 290, 300, 400, 450),
+                            n_students=n_students)
+    exact = fleet.linear_programming()['minimum_total_cost']
+
+    assert fleet.dynamic_programming()['minimum_total_cost'] == pytest.approx(exact)
+    assert fleet.brute_force()['minimum_total_cost'] == pytest.approx(exact)
+
+
+def test_fleet_brute_force_without_pruning():
+    fleet = FleetAllocation(seat_config=(30, 40, 50), cost_config=(300, 400, 500), n_students=321)
+    exact = fleet.linear_programming()['minimum_total_cost']
+
+    assert fleet.brute_force(max_chunk_bytes=1024, prune=False)['minimum_total_cost'] == pytest.approx(exact)
+
+
+def test_fleet_brute_force_many_types():
+    fleet = FleetAllocation(seat_config=(9, 12, 16, 20, 30, 35, 49, 57, 8, 25),
+                            cost_config=(110, 140, 180, 230, 290, 300, 400, 450, 100, 260),
+                            n_students=5000)
+    exact = fleet.linear_programming()['minimum_total_cost']
+
+    result = fleet.brute_force(max_chunk_bytes=2 ** 20)
+    assert result['minimum_total_cost'] == pytest.approx(exact)
+    assert fleet.seats @ [result[name] for name in fleet.names] >= 5000
+
+
+@pytest.mark.parametrize("n_students", [0, 1, 22, 179])
+def test_fleet_single_type(n_students):
+    fleet = FleetAllocation(seat_config=[22], cost_config=[41.], n_students=n_students)
+    expected = 41. * -(-n_students // 22)
+
+    assert fleet.dynamic_programming()['minimum_total_cost'] == pytest.approx(expected)
+    assert fleet.linear_programming()['minimum_total_cost'] == pytest.approx(expected)
+    assert fleet.solve_many([n_students])['minimum_total_cost'].iloc[0] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("seat_config, cost_config, names", [
+    ((30, 40), (300, 400, 500), None),
+    ((30, 0, 50), (300, 400, 500), None),
+    ((30, -40, 50), (300, 400, 500), None),
+    ((30, 40, 50), (300, 400, 500), ('small', 'large')),
+])
+def test_fleet_invalid_configuration(seat_config, cost_config, names):
+    with pytest.raises(ValueError):
+        FleetAllocation(seat_config=seat_config, cost_config=cost_config, n_students=100, names=names)
+
+
+@pytest.mark.parametrize("method", ["dynamic_programming", "linear_programming"])
+def test_solve_many(bus_allocation, method):
+    n_students_list = [0, 1, 99, 100, 321, 1000]
+    results = bus_allocation.solve_many(n_students_list, method=method)
+
+    assert list(results.columns) == ['n_students', 'A', 'B', 'C', 'minimum_total_cost']
+    assert results['n_students'].tolist() == n_students_list
+    for n_students, row in zip(n_students_list, results.itertuples()):
+        single = BusAllocation((30, 40, 50), (300, 400, 500), n_students).linear_programming()
+        assert row.minimum_total_cost == pytest.approx(single['minimum_total_cost'])
+        assert 30 * row.A + 40 * row.B + 50 * row.C >= n_students
+
+
+def test_fleet_solve_many(fleet_allocation):
+    n_students_list = np.arange(0, 20_000, 7)
+    results = fleet_allocation.solve_many(n_students_list)
+
+    assert len(results) == len(n_students_list)
+    assert (results[fleet_allocation.names].to_numpy() @ fleet_allocation.seats >= n_students_list).all()
+    exact = FleetAllocation(fleet_allocation.seats, fleet_allocation.costs, n_students=322).linear_programming()
+    assert results['minimum_total_cost'].iloc[322 // 7] == pytest.approx(exact['minimum_total_cost'])
+
+
+def test_solve_many_unknown_method(bus_allocation):
+    with pytest.raises(ValueError):
+        bus_allocation.solve_many([100], method='simplex')
@@ -0,0 +1,58 @@
+import pytest
+from optimization.core.bus_allocation import BusAllocation, FleetAllocation
+from optimization.core.cache import ResultCache
+
+
+@pytest.fixture
+def cache():
+    """Fixture to create an in-memory ResultCache."""
+    return ResultCache(maxsize=2)
+
+
+def test_cache_hits_and_misses(cache):
+    allocator = BusAllocation((30, 40, 50), (300, 400, 500), 100, cache=cache)
+
+    first = allocator.linear_programming()
+    second = allocator.linear_programming()
+
+    assert (first['cache_hits'], first['cache_misses']) == (0, 1)
+    assert (second['cache_hits'], second['cache_misses']) == (1, 1)
+    assert second['minimum_total_cost'] == first['minimum_total_cost']
+    assert {'elapsed_time', 'peak', 'current'} <= set(second.keys())
+
+
+def test_cache_key_depends_on_configuration_and_arguments(cache):
+    allocator = BusAllocation((30, 40, 50), (300, 400, 500), 100, cache=cache)
+    allocator.trivial_solution('A')
+    allocator.trivial_solution(bus='A')
+    result = allocator.trivial_solution('B')
+    assert (result['cache_hits'], result['cache_misses']) == (1, 2)
+
+    other = BusAllocation((30, 40, 50), (300, 400, 500), 101, cache=cache).trivial_solution('B')
+    assert other['cache_misses'] == 3
+
+
+def test_cache_is_bounded(cache):
+    for n_students in (100, 200, 300):
+        BusAllocation((30, 40, 50), (300, 400, 500), n_students, cache=cache).educated_guess()
+
+    assert len(cache) == 2
+    result = BusAllocation((30, 40, 50), (300, 400, 500), 100, cache=cache).educated_guess()
+    assert result['cache_misses'] == 4
+
+
+def test_cache_on_disk(tmp_path):
+    fleet = FleetAllocation((9, 16, 30), (110, 180, 290), 321, cache=ResultCache(directory=tmp_path))
+    expected = fleet.dynamic_programming()
+
+    fleet.cache = ResultCache(directory=tmp_path)
+    result = fleet.dynamic_programming()
+
+    assert result['cache_hits'] == 1
+    assert {k: result[k] for k in ('A', 'B', 'C', 'minimum_total_cost')} == \
+           {k: expected[k] for k in ('A', 'B', 'C', 'minimum_total_cost')}
+
+
+def test_no_cache_keys_by_default():
+    result = BusAllocation((30, 40, 50), (300, 400, 500), 100).educated_guess()
+    assert 'cache_hits' not in result
@@ -0,0 +1,28 @@
+import pytest
+from optimization.core.comparison import compare_strategies
+
+
+def test_compare_strategies():
+    table = compare_strategies((30, 40, 50), (300, 400, 500), [100, 321],
+                               strategies=['trivial_A', 'educated_guess', 'dynamic_programming'],
+                               max_workers=2)
+
+    assert len(table) == 6
+    assert (table['status'] == 'ok').all()
+    assert (table['gap'] >= 0).all()
+    assert (table.loc[table['strategy'] == 'dynamic_programming', 'gap'] == 0).all()
+
+
+def test_compare_strategies_timeout():
+    table = compare_strategies((30, 40, 50), (300, 400, 500), 100_000,
+                               strategies=['iterative_solution', 'dynamic_programming'],
+                               max_workers=2, timeout=0.5)
+
+    status = dict(zip(table['strategy'], table['status']))
+    assert status == {'iterative_solution': 'timeout', 'dynamic_programming': 'ok'}
+    assert table.loc[table['strategy'] == 'dynamic_programming', 'gap'].item() == 0
+
+
+def test_compare_unknown_strategy():
+    with pytest.raises(KeyError):
+        compare_strategies((30, 40, 50), (300, 400, 500), 100, strategies=['simplex'])
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+import sympy as sp
+
+from optimization.core.renewables import EnergyDistribution
+from optimization.equations.compiled import compile_constraints, compile_expression, solve
+from optimization.equations.equations import C_total, constraint_types, constraints
+from optimization.equations.linear import compile_linear_program
+
+
+def test_compile_expression():
+    compiled = compile_expression(C_total)
+    assert compile_expression(C_total) is compiled
+
+    x, p = np.array([1., 2., 3., 4.]), np.array([3., 5., 100., 150., 0.1, 0.05])
+    assert compiled.function(x, p) == pytest.approx(0.1 * 4 + 0.05 * 6)
+    assert compiled.gradient(x, p) == pytest.approx([0.1, 0.05, 0.1, 0.05])
+
+    demand_a, _, solar, _ = compile_constraints()
+    assert demand_a['fun'](x, p) == pytest.approx(0.)
+    assert solar['type'] == 'ineq' and solar['fun'](x, p) == pytest.approx(96.)
+    assert solar['jac'](x, p) == pytest.approx([-1., 0., -1., 0.])
+
+    with pytest.raises(ValueError):
+        compile_constraints(constraints, ('eq', 'eq', 'ineq', 'lt'))
+
+
+@pytest.mark.parametrize("parameters, expected", [
+    ((3., 5., 100., 150., 0.10, 0.05), {'xs': 0., 'xw': 3., 'ys': 0., 'yw': 5., 'minimum_total_cost': 0.4}),
+    ((90., 120., 150., 60.5, 0.15, 0.2), {'xs': None, 'xw': None, 'ys': None, 'yw': None,
+                                          'minimum_total_cost': 150 * 0.15 + 60 * 0.2}),
+])
+def test_solve(parameters, expected):
+    solution = solve(*parameters)
+    assert len(constraint_types) == len(constraints)
+    assert solution['xs'] + solution['xw'] == pytest.approx(parameters[0])
+    assert solution['ys'] + solution['yw'] == pytest.approx(parameters[1])
+    for name, value in expected.items():
+        if value is not None:
+            assert solution[name] == pytest.approx(value, abs=1e-6)
+
+
+def test_compile_linear_program():
+    program = compile_linear_program()
+    assert compile_linear_program() is program
+
+    problem = program.matrices([3., 5., 100., 150., 0.10, 0.05])
+    assert problem.c == pytest.approx([0.10, 0.05, 0.10, 0.05])
+    assert problem.A_eq.toarray() == pytest.approx(np.array([[1., 1., 0., 0.], [0., 0., 1., 1.]]))
+    assert problem.b_ub == pytest.approx([100., 150.])
+
+    for parameters in ([3., 5., 100., 150., 0.10, 0.05], [90., 120., 150., 60.5, 0.15, 0.2]):
+        assert program.solve(parameters)['minimum_total_cost'] == pytest.approx(
+            solve(*parameters)['minimum_total_cost'], abs=1e-6)
+
+
+def test_large_linear_program():
+    # Transport problem with parametric costs, written symbolically
+    n_sources, n_consumers = 5, 40
+    rng = np.random.default_rng(0)
+    flows = sp.symbols(f'f0:{n_sources * n_consumers}', nonnegative=True)
+    costs = sp.symbols(f'c0:{n_sources}', positive=True)
+    capacity, demand = rng.uniform(50, 100, n_sources), rng.uniform(0, 5, n_consumers)
+
+    def flow(i, j):
+        return flows[i * n_consumers + j]
+
+    objective = sum(costs[i] * flow(i, j) for i in range(n_sources) for j in range(n_consumers))
+    constraints = [sum(flow(i, j) for i in range(n_sources)) - demand[j] for j in range(n_consumers)] + \
+        [sum(flow(i, j) for j in range(n_consumers)) - capacity[i] for i in range(n_sources)]
+    types = ('eq',) * n_consumers + ('ineq',) * n_sources
+    program = compile_linear_program(objective, tuple(constraints), types, flows, costs)
+
+    system = EnergyDistribution()
+    cost_per_unit = rng.uniform(0.1, 0.3, n_sources)
+    system.add_sources({'name': [f"S{i}" for i in range(n_sources)], 'capacity': capacity,
+                        'cost_per_unit': cost_per_unit})
+    system.add_consumers({'name': [f"C{j}" for j in range(n_consumers)], 'demand': demand})
+    assert program.solve(cost_per_unit)['minimum_total_cost'] == pytest.approx(
+        system.solve_transport()['minimum_total_cost'])
+
+    with pytest.raises(ValueError):
+        compile_linear_program(objective, (flows[0] * flows[1],), ('ineq',), flows, costs)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from optimization.core.monte_carlo import StreamingStatistics, monte_carlo
+from optimization.core.renewables import Consumer, EnergyDistribution, EnergySource
+
+
+@pytest.fixture
+def energy_distribution():
+    system = EnergyDistribution()
+    system.add_source(EnergySource("Solar", 150, 0.15))
+    system.add_source(EnergySource("Wind", 100, 0.2))
+    system.add_consumer(Consumer("A", 90.))
+    system.add_consumer(Consumer("B", 120.))
+    return system
+
+
+def test_streaming_statistics():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.lognormal(3, 1, 10 ** 5), -rng.exponential(1, 10 ** 3), np.zeros(10)])
+    rng.shuffle(values)
+
+    statistics, merged = StreamingStatistics(0.01), StreamingStatistics(0.01)
+    for batch in np.array_split(values, 7):
+        statistics.update(batch)
+        part = StreamingStatistics(0.01)
+        part.update(batch)
+        merged.merge(part)
+
+    for summary in (statistics, merged):
+        assert summary.count == len(values)
+        assert summary.mean == pytest.approx(values.mean())
+        assert summary.std == pytest.approx(values.std(ddof=1))
+        assert (summary.min, summary.max) == (values.min(), values.max())
+        for q in (0., 0.001, 0.05, 0.5, 0.99, 1.):
+            assert summary.quantile(q) == pytest.approx(np.quantile(values, q, method='lower'), rel=0.01)
+
+    with pytest.raises(ValueError):
+        statistics.merge(StreamingStatistics(0.05))
+    with pytest.raises(ValueError):
+        StreamingStatistics().quantile(0.5)
+
+
+def test_monte_carlo(energy_distribution):
+    summary = monte_carlo(energy_distribution, 20_000, seed=1, batch_size=3_000, max_workers=2)
+    same_seed = monte_carlo(energy_distribution, 20_000, seed=1, batch_size=3_000, max_workers=1)
+
+    assert summary == same_seed
+    assert summary['count'] + summary['infeasible'] == 20_000
+    assert 0 < summary['infeasible'] < 20_000
+    # The nominal optimum uses all the solar power and 60 units of wind power
+    assert summary['quantiles'][0.5] == pytest.approx(150 * 0.15 + 60 * 0.2, rel=0.05)
+    assert summary['quantiles'][0.05] < summary['mean'] < summary['quantiles'][0.95]
+
+
+def test_monte_carlo_linprog(energy_distribution):
+    merit_order = monte_carlo(energy_distribution, 200, seed=2, batch_size=50, max_workers=2)
+    highs = monte_carlo(energy_distribution, 200, seed=2, batch_size=50, max_workers=2,
+                        edge_costs=np.zeros((2, 2)), method='highs')
+
+    assert highs['infeasible'] == merit_order['infeasible']
+    assert highs['mean'] == pytest.approx(merit_order['mean'])
+    with pytest.raises(ValueError):
+        monte_carlo(energy_distribution, 10, edge_costs=np.zeros((2, 2)), method='merit_order')
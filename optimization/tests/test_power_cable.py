@@ -0,0 +1,355 @@
+import itertools
+
+import numpy as np
+import pytest
+from scipy import sparse
+from scipy.optimize import minimize, minimize_scalar
+
+from optimization.core.power_cable import FeederNetwork, OptimalPowerFlow, compare_backends, power_loss, \
+    print_result, size_cables, thermal_min_diameter, transmission_lines
+
+RHO = 1.68e-8
+
+
+def test_power_loss_broadcasting():
+    d, currents = np.array([0.01, 0.02]), np.array([[10.], [100.]])
+    losses = power_loss(d, RHO, 1000., currents)
+
+    assert losses.shape == (2, 2)
+    assert losses[1, 0] == pytest.approx(power_loss(0.01, RHO, 1000., 100.))
+
+
+def test_size_cables_without_material_cost():
+    currents = np.linspace(10., 200., 50)
+    result = size_cables(currents, RHO, 1000., 0.001, 0.05)
+
+    # The loss decreases with the diameter, as found by the minimizer of the notebook
+    for current, diameter in zip(currents[::10], result['diameter'][::10]):
+        optimum = minimize(power_loss, x0=[0.01], bounds=[(0.001, 0.05)], args=(RHO, 1000., current))
+        assert diameter == pytest.approx(optimum.x[0], rel=1e-3)
+    assert result['feasible'].all()
+
+
+def test_size_cables_economic():
+    currents, lengths = np.array([20., 150., 400.]), np.array([100., 1000., 50.])
+    result = size_cables(currents, RHO, lengths, 0.001, 0.05, loss_cost=5., material_cost=9e4)
+
+    for current, length, diameter in zip(currents, lengths, result['diameter']):
+        cost = lambda d: 5. * power_loss(d, RHO, length, current) + 9e4 * length * np.pi * d ** 2 / 4
+        optimum = minimize_scalar(cost, bounds=(0.001, 0.05), method='bounded', options={'xatol': 1e-9})
+        assert diameter == pytest.approx(optimum.x, rel=1e-4)
+    assert result['total_cost'] == pytest.approx(
+        5. * result['power_loss'] + 9e4 * lengths * np.pi * result['diameter'] ** 2 / 4)
+
+
+def test_size_cables_ampacity():
+    currents = np.array([10., 100., 1000.])
+    result = size_cables(currents, RHO, 1000., 0.001, 0.01, h=10., delta_T=50., J_max=4e6,
+                         loss_cost=1e-3, material_cost=9e4)
+
+    minimum = np.maximum(thermal_min_diameter(currents, RHO, 10., 50.), np.sqrt(4 * currents / (np.pi * 4e6)))
+    assert (result['diameter'] >= np.minimum(minimum, 0.01) - 1e-15).all()
+    assert result['feasible'].tolist() == [True, True, False]
+    assert result['diameter'][2] == 0.01
+
+    # At the thermal limit, the Joule heat equals the heat removed from the surface
+    d = thermal_min_diameter(100., RHO, 10., 50.)
+    assert power_loss(d, RHO, 1., 100.) == pytest.approx(10. * np.pi * d * 50.)
+
+    with pytest.raises(ValueError):
+        size_cables(currents, RHO, 1000., 0.001, 0.01, h=10.)
+
+
+def random_tree(n_nodes, rng):
+    # Node i > 0 hangs from a random node before it, so that node 0 is the supply point
+    source = np.array([rng.integers(0, i) for i in range(1, n_nodes)])
+    target = np.arange(1, n_nodes)
+    return FeederNetwork(source, target, rng.uniform(10, 500, n_nodes - 1), load=rng.uniform(0, 50, n_nodes))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_feeder_network_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    network = random_tree(7, rng)
+    diameters = [0.02, 0.004, 0.008, 0.012]
+    result = network.size(diameters, RHO, loss_cost=5., material_cost=9e4)
+
+    # Enumerate every assignment of catalogue sizes whose diameters do not increase downstream
+    sizes = np.sort(diameters)
+    best = np.inf
+    for assignment in itertools.product(range(len(sizes)), repeat=len(network.source)):
+        assignment = np.array(assignment)
+        roots = network.parent < 0
+        if (assignment[~roots] > assignment[network.parent[~roots]]).any():
+            continue
+        d = sizes[assignment]
+        cost = (5. * power_loss(d, RHO, network.length, network.current) +
+                9e4 * network.length * np.pi * d ** 2 / 4).sum()
+        best = min(best, cost)
+
+    assert result['total_cost'] == pytest.approx(best)
+    assert (result['diameter'][~roots] <= result['diameter'][network.parent[~roots]]).all()
+    assert np.array(diameters)[result['index']] == pytest.approx(result['diameter'])
+
+
+def test_feeder_network():
+    network = FeederNetwork([0, 1, 1, 3], [1, 2, 3, 4], 100., load=[0., 5., 20., 0., 30.])
+    assert network.current.tolist() == [55., 20., 30., 30.]
+    assert [level.tolist() for level in network.levels] == [[0], [1, 2], [3]]
+
+    free = network.size([0.005, 0.01], RHO, 5., 9e4, monotone=False)
+    assert free['total_cost'] <= network.size([0.005, 0.01], RHO, 5., 9e4)['total_cost']
+    limited = network.size([0.005, 0.01], RHO, 5., 9e4, ampacity=[25., 100.])
+    assert limited['diameter'].tolist() == [0.01, 0.005, 0.01, 0.01]
+
+    with pytest.raises(ValueError):
+        network.size([0.005, 0.01], RHO, 5., 9e4, ampacity=[10., 50.])
+    with pytest.raises(ValueError):
+        FeederNetwork([0, 1], [1, 1], 100., current=1.)
+    with pytest.raises(ValueError):
+        FeederNetwork([0, 1, 2], [1, 2, 1], 100., current=1.)
+
+
+def test_large_feeder_network():
+    rng = np.random.default_rng(0)
+    n_nodes = 10 ** 5
+    source = (rng.uniform(size=n_nodes - 1) * np.arange(1, n_nodes)).astype(int)
+    load = rng.uniform(0, 1, n_nodes)
+    network = FeederNetwork(source, np.arange(1, n_nodes), rng.uniform(10, 100, n_nodes - 1), load=load)
+    result = network.size(np.geomspace(0.002, 0.05, 12), RHO, 5., 9e4)
+
+    assert network.current[network.parent < 0].sum() == pytest.approx(load[1:].sum())
+    children = network.parent >= 0
+    assert (result['diameter'][children] <= result['diameter'][network.parent[children]]).all()
+
+
+@pytest.fixture
+def opf_data():
+    # Data of the optimal_power_flow notebook
+    return (3, [(0.1, 14, 30), (0.15, 15, 25), (0.2, 10, 10)], [10, 10, 10], [100, 90, 80], 150,
+            {('1', '2'): 50, ('1', '3'): 50, ('2', '3'): 30})
+
+
+@pytest.mark.parametrize("backend", ["slsqp", "trust-constr"])
+def test_optimal_power_flow(opf_data, backend, capsys):
+    opf = OptimalPowerFlow(*opf_data, backend=backend)
+    opf.setup_problem()
+    result = opf.solve(reporter=print_result)
+
+    # No limit binds, so every generator runs at the marginal price lambda: 2 a p + b = lambda
+    a, b = np.array(opf_data[1])[:, 0], np.array(opf_data[1])[:, 1]
+    marginal_price = (150 + (b / (2 * a)).sum()) / (1 / (2 * a)).sum()
+    outputs = (marginal_price - b) / (2 * a)
+    cost = (a * outputs ** 2 + b * outputs).sum() + 65
+    assert capsys.readouterr().out.splitlines() == ["Solution found:"] + \
+        [f"Generator {i + 1} Output: {output:.2f} MW" for i, output in enumerate(outputs)] + \
+        [f"Total Generation Cost: ${cost:.2f}"]
+    assert result.status == 'optimal'
+    assert result.outputs == pytest.approx(outputs, rel=1e-6)
+    assert result.objective == pytest.approx(cost)
+    assert result.marginal_price == pytest.approx(marginal_price, rel=1e-6)
+    assert result.line_duals == pytest.approx(np.zeros(3), abs=1e-6)
+    assert result.build_time == opf.build_time > 0 and result.solve_time == opf.solve_time > 0
+
+    # Nothing is printed without a reporter
+    opf.solve()
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.parametrize("backend", ["slsqp", "trust-constr"])
+@pytest.mark.parametrize("binding", [0, 2])
+def test_optimal_power_flow_duals(opf_data, backend, binding):
+    num_generators, cost_coeffs, min_output, max_output, demand, _ = opf_data
+    # Line 0 binds at p_1 - p_2 = 5, line 2 at p_2 - p_3 = -1
+    keys = [('1', '2'), ('1', '3'), ('2', '3')]
+    limits = dict(zip(keys, [5, 50, 30] if binding == 0 else [50, 50, 1]))
+
+    def objective(demand, limits):
+        opf = OptimalPowerFlow(num_generators, cost_coeffs, min_output, max_output, demand, limits, backend=backend)
+        opf.setup_problem()
+        return opf.solve()
+
+    # The duals are the derivatives of the objective by the demand and by the limit of the binding line
+    result = objective(demand, limits)
+    assert result.marginal_price == pytest.approx(
+        (objective(demand + 1e-3, limits).objective - result.objective) / 1e-3, rel=1e-4)
+    relaxed = {**limits, keys[binding]: limits[keys[binding]] + 1e-3}
+    assert result.line_duals[binding] == pytest.approx((objective(demand, relaxed).objective - result.objective) / 1e-3,
+                                                       rel=1e-3)
+    assert result.line_duals[binding] < 0
+    assert np.delete(result.line_duals, binding) == pytest.approx(np.zeros(2), abs=1e-4)
+
+
+def test_optimal_power_flow_limits(opf_data, capsys):
+    num_generators, cost_coeffs, min_output, max_output, demand, _ = opf_data
+    limits = {('1', '2'): 5, ('1', '3'): 5, ('2', '3'): 5}
+    table = compare_backends(num_generators, cost_coeffs, min_output, max_output, demand, limits,
+                             backends=['trust-constr', 'slsqp'])
+    assert sorted(table['backend']) == ['slsqp', 'trust-constr']
+    assert table['objective'].to_numpy() == pytest.approx(table['objective'].iloc[0])
+
+    opf = OptimalPowerFlow(num_generators, cost_coeffs, min_output, max_output, 400, limits, backend='slsqp')
+    opf.setup_problem()
+    result = opf.solve(reporter=print_result)
+    assert capsys.readouterr().out == "No solution found\n"
+    assert result.status == 'infeasible' and result.outputs is None
+
+    with pytest.raises(KeyError):
+        OptimalPowerFlow(*opf_data, backend='gurobi')
+
+
+@pytest.mark.parametrize("backend", ["slsqp", "trust-constr"])
+def test_optimal_power_flow_iteration_limit(opf_data, backend, capsys):
+    opf = OptimalPowerFlow(*opf_data, backend=backend)
+    opf.setup_problem()
+    optimal = opf.solve()
+
+    # A point where the solver stopped early is not reported as optimal
+    opf._backend.options = {'maxiter': 2}
+    result = opf.solve(reporter=print_result)
+    assert result.status == 'iteration_limit'
+    assert result.objective >= optimal.objective - 1e-6 and result.marginal_price is None
+    assert capsys.readouterr().out == "No solution found (iteration_limit)\n"
+
+
+@pytest.mark.parametrize("backend", ["slsqp", "trust-constr"])
+def test_optimal_power_flow_without_lines(opf_data, backend):
+    num_generators, cost_coeffs, min_output, max_output, demand, _ = opf_data
+    opf = OptimalPowerFlow(num_generators, cost_coeffs, min_output, max_output, demand, {}, backend=backend)
+    opf.setup_problem()
+    assert opf.solve().outputs.sum() == pytest.approx(demand)
+
+    # A single generator supplies the whole demand
+    opf = OptimalPowerFlow(1, cost_coeffs[:1], 10, 100, 60, {}, backend=backend)
+    opf.setup_problem()
+    result = opf.solve()
+    assert result.outputs == pytest.approx([60.])
+    assert result.objective == pytest.approx(0.1 * 60 ** 2 + 14 * 60 + 30)
+
+
+def test_transmission_lines(opf_data):
+    num_generators, cost_coeffs, min_output, max_output, demand, limits = opf_data
+    edge_list = [(0, 1, 50), (0, 2, 50), (1, 2, 30)]
+    matrix = sparse.coo_array(([50., 50., 30.], ([0, 0, 1], [1, 2, 2])), shape=(3, 3))
+
+    for transmission_limits in (limits, edge_list, matrix):
+        first, second, line_limits = transmission_lines(transmission_limits, num_generators)
+        assert sorted(zip(first.tolist(), second.tolist(), line_limits.tolist())) == edge_list
+
+    with pytest.raises(ValueError):
+        transmission_lines([(0, 3, 10.)], num_generators)
+
+
+def test_optimal_power_flow_lines():
+    # A chain of 200 generators, with a line between neighbours only
+    n = 200
+    rng = np.random.default_rng(0)
+    cost_coeffs = np.column_stack([rng.uniform(0.1, 0.2, n), rng.uniform(10, 15, n), rng.uniform(10, 30, n)])
+    lines = np.column_stack([np.arange(n - 1), np.arange(1, n), np.full(n - 1, 5.)])
+
+    opf = OptimalPowerFlow(n, cost_coeffs, [10] * n, [100] * n, 50 * n, lines, backend='trust-constr')
+    opf.setup_problem()
+    outputs = opf.solve().outputs
+
+    assert opf._backend.constraints[1].A.shape == (n - 1, n)
+    assert outputs.sum() == pytest.approx(50 * n)
+    assert np.abs(np.diff(outputs)).max() <= 5 + 1e-6
+
+
+def test_dispatch(opf_data):
+    num_generators, cost_coeffs, min_output, max_output, _, limits = opf_data
+    opf = OptimalPowerFlow(*opf_data, backend='slsqp')
+    demand = np.array([100., 150., 220., 150.])
+    dispatch = opf.dispatch(demand, segments=200)
+
+    # Without ramping, every period is the single-period OPF of its demand, up to the linearization
+    for t, period_demand in enumerate(demand):
+        single = OptimalPowerFlow(num_generators, cost_coeffs, min_output, max_output, period_demand, limits,
+                                  backend='slsqp')
+        single.setup_problem()
+        result = single.solve()
+        assert dispatch['outputs'][:, t] == pytest.approx(result.outputs, abs=1)
+        assert dispatch['cost'][t] == pytest.approx(result.objective, rel=1e-4)
+    assert dispatch['total_cost'] == pytest.approx(dispatch['cost'].sum())
+    assert dispatch['status'].all()
+
+    # A rolling horizon gives the same dispatch when ramping does not bind
+    rolling = opf.dispatch(demand, segments=200, window=2, step=1)
+    assert rolling['outputs'] == pytest.approx(dispatch['outputs'])
+
+    with pytest.raises(ValueError):
+        opf.dispatch(demand, window=2, step=3)
+
+
+def test_dispatch_ramping(opf_data):
+    opf = OptimalPowerFlow(*opf_data, backend='slsqp')
+    demand = np.array([100., 150., 220., 150., 100.])
+    initial_output = np.array([40., 30., 30.])
+
+    for window, step in ((None, None), (3, 1), (2, 2)):
+        dispatch = opf.dispatch(demand, ramp_rate=25, window=window, step=step, initial_output=initial_output)
+        outputs = np.column_stack([initial_output, dispatch['outputs']])
+        assert np.abs(np.diff(outputs, axis=1)).max() <= 25 + 1e-6
+        assert dispatch['outputs'].sum(axis=0) == pytest.approx(demand)
+
+    with pytest.raises(ValueError):
+        opf.dispatch(demand, ramp_rate=10, initial_output=initial_output)
+
+
+def test_dispatch_commitment(opf_data):
+    opf = OptimalPowerFlow(*opf_data, backend='slsqp')
+    demand = np.array([25., 150., 25.])
+
+    # The demand of 25 MW is below the sum of the minimum outputs, so some generators must be off
+    with pytest.raises(ValueError):
+        opf.dispatch(demand)
+
+    dispatch = opf.dispatch(demand, commitment=True)
+    assert dispatch['outputs'].sum(axis=0) == pytest.approx(demand)
+    assert dispatch['status'][:, 1].all() and not dispatch['status'][:, [0, 2]].all(axis=0).any()
+    assert (dispatch['outputs'][~dispatch['status']] == 0).all()
+    assert (dispatch['outputs'][dispatch['status']] >= 10 - 1e-6).all()
+
+
+def test_sweep(opf_data, monkeypatch):
+    num_generators, cost_coeffs, min_output, max_output, demand, limits = opf_data
+    opf = OptimalPowerFlow(*opf_data, backend='slsqp')
+    demands = [20., 100., 150., 260., 300.]
+    table = opf.sweep(demands)
+
+    assert table['demand'].tolist() == demands
+    assert table['status'].tolist() == ['infeasible', 'optimal', 'optimal', 'optimal', 'infeasible']
+    assert table['objective'].iloc[[0, 4]].isna().all()
+    for row in table.iloc[1:4].itertuples():
+        single = OptimalPowerFlow(num_generators, cost_coeffs, min_output, max_output, row.demand, limits,
+                                  backend='slsqp')
+        single.setup_problem()
+        result = single.solve()
+        assert row.objective == pytest.approx(result.objective)
+        assert row.marginal_price == pytest.approx(result.marginal_price, rel=1e-6)
+    assert table['marginal_price'].iloc[1:4].is_monotonic_increasing
+
+    # The model is left with its own demand
+    assert opf.demand == demand
+    assert opf.solve().objective == pytest.approx(table['objective'].iloc[2])
+
+    # Even when a solve raises in the middle of the sweep
+    solve = opf._backend.solve
+    calls = []
+
+    def failing_solve(x0=None):
+        calls.append(x0)
+        if len(calls) > 1:
+            raise RuntimeError("solver crashed")
+        return solve(x0)
+
+    monkeypatch.setattr(opf._backend, 'solve', failing_solve)
+    with pytest.raises(RuntimeError):
+        opf.sweep([100., 200.])
+    monkeypatch.undo()
+    assert opf.demand == demand
+    assert opf.solve().objective == pytest.approx(table['objective'].iloc[2])
+
+    for other in (opf.sweep(demands, warm_start=False), opf.sweep(demands, max_workers=2)):
+        assert other['status'].tolist() == table['status'].tolist()
+        assert other['objective'].to_numpy() == pytest.approx(table['objective'].to_numpy(), nan_ok=True)
@@ -0,0 +1,124 @@
+import json
+import logging
+import threading
+
+import numpy as np
+import pytest
+from optimization.core.bus_allocation import BusAllocation
+from optimization.core.profiling import Profiler
+from optimization.core.wrappers import instrumentation, performance_measure, set_instrumentation, time_measure
+
+
+@pytest.fixture
+def profiler():
+    """Fixture to create an empty Profiler registry."""
+    return Profiler()
+
+
+def test_profile_records_calls(profiler, tmp_path):
+    @profiler.profile
+    def add(a, b):
+        return a + b
+
+    assert [add(i, 1) for i in range(10)] == list(range(1, 11))
+
+    summary = profiler.summary()[add.__qualname__]
+    assert summary['count'] == 10
+    assert summary['memory_samples'] == 10
+    assert summary['p50_ms'] <= summary['p95_ms'] <= summary['p99_ms'] <= summary['max_ms']
+    assert sum(summary['histogram_ns'].values()) == 10
+
+    profiler.dump(tmp_path / 'profile.json')
+    assert json.loads((tmp_path / 'profile.json').read_text())[add.__qualname__]['count'] == 10
+
+    profiler.reset()
+    add(1, 2)
+    assert profiler.summary()[add.__qualname__]['count'] == 1
+
+
+def test_profile_samples_memory(profiler):
+    @profiler.profile(name='allocate', sample_every=4)
+    def allocate():
+        return np.ones(10 ** 5)
+
+    for _ in range(10):
+        allocate()
+
+    summary = profiler.summary()['allocate']
+    assert summary['count'] == 10
+    assert summary['memory_samples'] == 3
+    assert summary['peak_memory'] >= 8 * 10 ** 5
+
+
+def test_profile_threads(profiler):
+    @profiler.profile(name='work', sample_every=2)
+    def work():
+        return np.ones(1000).sum()
+
+    threads = [threading.Thread(target=lambda: [work() for _ in range(100)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert profiler.summary()['work']['count'] == 400
+
+
+def test_nested_performance_measure():
+    @performance_measure
+    def inner():
+        np.ones(10 ** 6)
+        return {}
+
+    @time_measure
+    @performance_measure
+    def outer():
+        result = inner()
+        return {'inner_peak': result['peak']}
+
+    result = outer()
+    assert result['inner_peak'] >= 8 * 10 ** 6
+    assert result['peak'] >= result['inner_peak']
+    assert result['elapsed_time'] > 0
+
+
+def test_wrappers_do_not_mutate_result():
+    original = {'A': 1}
+
+    @time_measure
+    @performance_measure
+    def solver():
+        return original
+
+    result = solver()
+    assert original == {'A': 1}
+    assert {'elapsed_time', 'current', 'peak'} <= set(result.keys())
+
+
+def test_instrumentation_switch():
+    allocator = BusAllocation((30, 40, 50), (300, 400, 500), 100)
+    metrics = {'elapsed_time', 'current', 'peak'}
+
+    assert metrics <= set(allocator.educated_guess().keys())
+    assert not metrics & set(allocator.educated_guess(instrument=False).keys())
+
+    with instrumentation(False):
+        assert not metrics & set(allocator.educated_guess().keys())
+        assert metrics <= set(allocator.educated_guess(instrument=True).keys())
+
+    set_instrumentation(False)
+    try:
+        assert not metrics & set(allocator.educated_guess().keys())
+    finally:
+        set_instrumentation(True)
+
+
+def test_instrumentation_logs_result(caplog):
+    allocator = BusAllocation((30, 40, 50), (300, 400, 500), 100)
+
+    with caplog.at_level(logging.INFO, logger='optimization.core.bus_allocation'):
+        allocator.educated_guess()
+        allocator.educated_guess(instrument=False)
+
+    assert len(caplog.records) == 1
+    assert caplog.records[0].result['minimum_total_cost'] == 1000
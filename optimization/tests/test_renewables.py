@@ -1,5 +1,6 @@
 import pytest
 import numpy as np
+import pandas as pd
 from optimization.core.renewables import EnergyDistribution, EnergySource, Consumer
 
 
@@ -67,3 +68,238 @@ def test_input_cost_shape(energy_distribution, guess_solution):
 
     assert energy_distribution.cost_function(guess_solution) == \
            energy_distribution.cost_function(guess_solution.flatten())
+
+
+@pytest.fixture
+def tight_distribution():
+    """Fixture to create a system where the feasible region of the flows is thin."""
+    system = EnergyDistribution()
+    system.add_source(EnergySource("Solar", 150, 0.15))
+    system.add_source(EnergySource("Wind", 60.5, 0.2))
+    system.add_consumer(Consumer("A", 90.))
+    system.add_consumer(Consumer("B", 120.))
+    system.read_max_values()
+    return system
+
+
+@pytest.mark.parametrize("method", ["polytope", "rejection"])
+def test_sample_solutions(tight_distribution, method):
+    solutions = tight_distribution.sample_solutions(10 ** 4, seed=0, method=method)
+
+    assert solutions.shape == (10 ** 4, 2, 2)
+    assert (solutions >= -1e-9).all()
+    assert np.allclose(solutions.sum(axis=2), [90., 120.])
+    assert (solutions[:, :, 0].sum(axis=1) <= 150 + 1e-9).all()
+    assert (solutions[:, :, 1].sum(axis=1) <= 60.5 + 1e-9).all()
+    for solution in solutions[:10]:
+        assert tight_distribution.check_solution_integrity(solution)
+
+
+def test_sample_solutions_seed(tight_distribution):
+    assert np.array_equal(tight_distribution.sample_solutions(100, seed=42),
+                          tight_distribution.sample_solutions(100, seed=42))
+
+
+def test_sample_solutions_infeasible(tight_distribution):
+    tight_distribution.W_max = 50.
+    with pytest.raises(ValueError):
+        tight_distribution.sample_solutions(10)
+
+
+def test_generate_many_solutions(tight_distribution):
+    solutions, costs = tight_distribution.generate_many_solutions(nsolutions=1000, seed=0, batch_size=300)
+
+    assert solutions.shape == (1000, 2, 2)
+    assert costs.shape == (1000,)
+    assert costs == pytest.approx([tight_distribution.cost_function(solution) for solution in solutions])
+
+
+def test_generate_many_solutions_dedup(tight_distribution):
+    solutions, costs = tight_distribution.generate_many_solutions(nsolutions=1000, seed=0, decimals=0)
+
+    assert len(solutions) == len(costs) < 1000
+    assert len(np.unique(solutions.reshape(len(solutions), -1), axis=0)) == len(solutions)
+
+
+@pytest.mark.parametrize("method", ["merit_order", "highs", "highs-ipm"])
+def test_solve_transport(tight_distribution, method):
+    result = tight_distribution.solve_transport(method=method)
+
+    # Solar is the cheapest source and is used up to its capacity
+    assert result['flows'].shape == (2, 2)
+    assert result['flows'].sum(axis=0) == pytest.approx([90., 120.])
+    assert result['flows'][0].sum() == pytest.approx(150.)
+    assert result['minimum_total_cost'] == pytest.approx(0.15 * 150 + 0.2 * 60)
+
+
+def test_solve_transport_large():
+    rng = np.random.default_rng(0)
+    system = EnergyDistribution()
+    for i, (capacity, cost) in enumerate(zip(rng.uniform(25, 50, 20), rng.uniform(0.05, 0.3, 20))):
+        system.add_source(EnergySource(f"S{i}", capacity, cost))
+    for j, demand in enumerate(rng.uniform(0, 2, 200)):
+        system.add_consumer(Consumer(f"C{j}", demand))
+
+    edge_costs = rng.uniform(0, 0.01, (20, 200))
+    result = system.solve_transport(edge_costs)
+    problem = system.transport_problem(edge_costs)
+
+    assert result['flows'].sum(axis=0) == pytest.approx(problem.b_eq)
+    assert (result['flows'].sum(axis=1) <= problem.b_ub + 1e-6).all()
+    assert result['minimum_total_cost'] == pytest.approx(problem.c @ result['flows'].ravel())
+
+
+def test_solve_transport_edge_costs_in_place(tight_distribution):
+    edge_costs = np.zeros((2, 2))
+    before = tight_distribution.solve_transport(edge_costs)['minimum_total_cost']
+
+    # The cached problem must follow edge costs modified in place
+    edge_costs += 1.
+    after = tight_distribution.solve_transport(edge_costs)['minimum_total_cost']
+    assert after == pytest.approx(before + 210.)
+
+
+@pytest.mark.parametrize("method", ["merit_order", "highs"])
+def test_solve_transport_infeasible(energy_distribution, method):
+    energy_distribution.add_consumer(Consumer("C", 1000.))
+    with pytest.raises(ValueError):
+        energy_distribution.solve_transport(method=method)
+
+
+def test_merit_order_matches_linear_programming():
+    rng = np.random.default_rng(1)
+    system = EnergyDistribution()
+    for i, (capacity, cost) in enumerate(zip(rng.uniform(5, 10, 6), rng.uniform(0.05, 0.3, 6))):
+        system.add_source(EnergySource(f"S{i}", capacity, cost))
+    for j, demand in enumerate(rng.uniform(0, 2, 20)):
+        system.add_consumer(Consumer(f"C{j}", demand))
+
+    merit_order = system.solve_transport()
+    highs = system.solve_transport(method='highs')
+    assert merit_order['minimum_total_cost'] == pytest.approx(highs['minimum_total_cost'])
+    assert merit_order['flows'].sum(axis=0) == pytest.approx(system.transport_problem().b_eq)
+
+
+def test_linear_constraints(energy_distribution, guess_solution):
+    demand, capacity = energy_distribution.linear_constraints()
+
+    # guess_solution is laid out consumer x source, the transport problem source x consumer
+    x = guess_solution.T.ravel()
+    assert demand.A @ x == pytest.approx([3., 5.])
+    assert (capacity.A @ x <= capacity.ub).all()
+    assert energy_distribution.objective(x) == pytest.approx(energy_distribution.cost_function(guess_solution))
+    assert energy_distribution.gradient(x) == pytest.approx([0.10, 0.10, 0.05, 0.05])
+
+
+@pytest.mark.parametrize("method", ["trust-constr", "SLSQP"])
+def test_solve(tight_distribution, method):
+    result = tight_distribution.solve(method=method)
+    exact = tight_distribution.solve_transport()
+
+    assert result['minimum_total_cost'] == pytest.approx(exact['minimum_total_cost'], rel=1e-4)
+    assert result['flows'].sum(axis=0) == pytest.approx([90., 120.], rel=1e-4)
+
+
+def test_bulk_loaders(energy_distribution):
+    n_consumers = 10 ** 5
+    energy_distribution.add_consumers({'name': [f"C{j}" for j in range(n_consumers)],
+                                       'demand': np.full(n_consumers, 1e-3)})
+    energy_distribution.add_sources(pd.DataFrame({'name': ["Hydro"], 'capacity': [50], 'cost_per_unit': [0.2]}))
+
+    assert energy_distribution.n_consumers == n_consumers + 2
+    assert energy_distribution.n_sources == 3
+    assert energy_distribution.sources["Hydro"] == {'capacity': 50, 'cost_per_unit': 0.2, 'unit': 'kW'}
+    assert energy_distribution.demand[-1] == 1e-3
+
+    # The snapshots are cached until the next update
+    consumers = energy_distribution.consumers
+    assert energy_distribution.consumers is consumers
+    energy_distribution.update_demand("C7", 2.)
+    assert energy_distribution.consumers is not consumers and energy_distribution.consumers["C7"] == {'demand': 2.}
+
+    with pytest.raises(KeyError):
+        energy_distribution.add_consumers({'name': ["C7"], 'demand': [1.]})
+    with pytest.raises(KeyError):
+        energy_distribution.add_sources({'name': ["Tidal", "Tidal"], 'capacity': [1, 1], 'cost_per_unit': [1, 1]})
+    with pytest.raises(KeyError):
+        energy_distribution.add_source(EnergySource("Solar", 1, 1.))
+    assert energy_distribution.n_sources == 3
+
+
+def test_constraints(energy_distribution, guess_solution):
+    flows = {'Solar': {'A': 1.5, 'B': 2.}, 'Wind': {'A': 1.5, 'B': 3.}}
+
+    # guess_solution is laid out consumer x source, the constraints take source x consumer
+    assert energy_distribution.demand_constraint(flows) == pytest.approx([0., 0.])
+    assert energy_distribution.capacity_constraint(flows) == pytest.approx([96.5, 145.5])
+    assert energy_distribution.capacity_constraint(guess_solution.T) == pytest.approx([96.5, 145.5])
+    batch = np.stack([guess_solution.T.ravel(), np.zeros(4)])
+    assert energy_distribution.demand_constraint(batch) == pytest.approx(np.array([[0., 0.], [3., 5.]]))
+
+
+@pytest.fixture
+def hourly_profiles():
+    hours = np.arange(24 * 30)
+    rng = np.random.default_rng(0)
+    return {'Solar': 150 * np.clip(np.sin(np.pi * (hours % 24 - 6) / 12), 0, None),
+            'Wind': rng.uniform(130, 200, len(hours)),
+            'A': rng.uniform(20, 60, len(hours)),
+            'B': rng.uniform(20, 60, len(hours))}
+
+
+def test_dispatch_series(tight_distribution, hourly_profiles):
+    chunks = list(tight_distribution.dispatch_series(hourly_profiles, chunk_size=100))
+    assert [chunk['start'] for chunk in chunks] == list(range(0, 720, 100))
+
+    flows = np.concatenate([chunk['flows'] for chunk in chunks])
+    costs = np.concatenate([chunk['costs'] for chunk in chunks])
+    assert flows.shape == (720, 2, 2)
+    assert flows.sum(axis=1) == pytest.approx(np.column_stack([hourly_profiles['A'], hourly_profiles['B']]))
+    assert (flows.sum(axis=2) <= np.column_stack([hourly_profiles['Solar'], hourly_profiles['Wind']]) + 1e-9).all()
+
+    for hour in (0, 12, 719):
+        snapshot = EnergyDistribution()
+        snapshot.add_sources({'name': ["Solar", "Wind"], 'capacity': [hourly_profiles['Solar'][hour],
+                                                                      hourly_profiles['Wind'][hour]],
+                              'cost_per_unit': [0.15, 0.2]})
+        snapshot.add_consumers({'name': ["A", "B"], 'demand': [hourly_profiles['A'][hour], hourly_profiles['B'][hour]]})
+        assert costs[hour] == pytest.approx(snapshot.solve_transport()['minimum_total_cost'])
+
+
+def test_dispatch_series_sources(tight_distribution, hourly_profiles, tmp_path):
+    path = tmp_path / "profiles.csv"
+    pd.DataFrame(hourly_profiles).to_csv(path, index=False)
+    merit_order = np.concatenate([chunk['costs'] for chunk in tight_distribution.dispatch_series(path, 200)])
+
+    # Sources and consumers missing from the profiles keep their static values
+    for chunk in tight_distribution.dispatch_series({'Wind': hourly_profiles['Wind']}, 300):
+        assert chunk['flows'].sum(axis=1) == pytest.approx(np.tile([90., 120.], (len(chunk['flows']), 1)))
+
+    zero_edges = tight_distribution.dispatch_series(pd.DataFrame(hourly_profiles), 200, edge_costs=np.zeros((2, 2)))
+    highs = np.concatenate([chunk['costs'] for chunk in zero_edges])
+    assert highs == pytest.approx(merit_order, rel=1e-6)
+
+
+@pytest.mark.parametrize("solve", [lambda system: system.solve_transport(),
+                                   lambda system: system.solve_transport(np.full((2, 2), 0.01), method='highs'),
+                                   lambda system: system.solve(method='SLSQP')])
+def test_resolve(tight_distribution, solve):
+    with pytest.raises(ValueError):
+        tight_distribution.resolve()
+
+    solve(tight_distribution)
+    tight_distribution.update_demand("A", 60.)
+    tight_distribution.update_capacity("Solar", 130.)
+    warm = tight_distribution.resolve()
+
+    cold = EnergyDistribution()
+    cold.add_source(EnergySource("Solar", 130, 0.15))
+    cold.add_source(EnergySource("Wind", 60.5, 0.2))
+    cold.add_consumer(Consumer("A", 60.))
+    cold.add_consumer(Consumer("B", 120.))
+    assert warm['minimum_total_cost'] == pytest.approx(solve(cold)['minimum_total_cost'], rel=1e-6)
+    assert warm['flows'].sum(axis=0) == pytest.approx([60., 120.])
+    assert tight_distribution.transport_problem().b_ub == pytest.approx([130., 60.5])
+
+    with pytest.raises(KeyError):
+        tight_distribution.update_demand("C", 1.)